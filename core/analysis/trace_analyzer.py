@@ -1,39 +1,151 @@
 # core/trace_analyzer.py (Corrected)
 import sqlite3
-import json
+import threading
+from collections import defaultdict
+from functools import lru_cache
+
+# orjson is an optional speedup; payload decoding dominates large event logs.
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
+
+# Indexes backing the analyzer's lookups (time ranges, per-table history, DAG joins).
+_EVENT_LOG_INDEXES = (
+    ("idx_event_log_ts", "timestamp"),
+    ("idx_event_log_table_ts", "table_name, timestamp"),
+    ("idx_event_log_correlation", "correlation_id"),
+    ("idx_event_log_causation", "causation_id"),
+    ("idx_event_log_event_id", "event_id"),
+)
+
+# Applied to every read connection: reject writes, memory-map up to 1 GiB of
+# the file, 128 MiB page cache, in-memory temp b-trees for ORDER BY/DISTINCT.
+# Writes (ensure_indexes) go through a separate read-write connection.
+_READ_PRAGMAS = (
+    "PRAGMA query_only=ON",
+    "PRAGMA mmap_size=1073741824",
+    "PRAGMA cache_size=-131072",
+    "PRAGMA temp_store=MEMORY",
+)
+
+# Largest warm event cache that _get_row_state_before_event scans in Python
+_CACHE_SCAN_LIMIT = 20000
+
+# Primary key of the row an event touches: 'id' for CREATE, 'where.id' for UPDATE.
+# Compared as trimmed text, matching str(pk).strip() on the Python side.
+_ROW_PK_SQL = """trim(CAST(CASE action WHEN 'CREATE' THEN json_extract(payload, '$.id')
+                                ELSE json_extract(payload, '$.where.id') END AS TEXT))"""
+
+# Columns returned for each event by get_all_events / get_history_for_field
+_EVENT_COLUMNS = (
+    'event_id', 'timestamp', 'correlation_id', 'causation_id', 'component',
+    'handler_name', 'trigger_message', 'table_name', 'action', 'payload',
+)
+_EVENT_SELECT = f"SELECT {', '.join(_EVENT_COLUMNS)} FROM event_log"
+
+def _timestamp_param(value):
+    """
+    Normalizes a timestamp for comparison against event_log.timestamp.
+
+    Timestamps are stored as ISO-8601 UTC text, which sorts chronologically, so
+    range filters are plain text comparisons served by the timestamp indexes.
+    datetime objects must be bound in the same format, not str()'s space form.
+    """
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
 
 class TraceAnalyzer:
     def __init__(self, db_path):
         self.db_path = db_path
         # PERFORMANCE FIX: Cache events to avoid repeated DB queries
         self._events_cache = None
+        # Row key of each cached event (see _row_pk), kept beside the public dicts
+        self._event_pks = None
         self._cache_valid = False
-        # The connection and cache are no longer stored on the instance (self).
-        # This makes the object stateless.
+        # PERFORMANCE FIX: DAGs keyed by (correlation_id, topology_only) and
+        # children maps keyed by correlation_id
+        self._dag_cache = {}
+        self._children_cache = {}
+        # PERFORMANCE FIX: Per-instance LRU of diff before-states, keyed by
+        # (table_name, pk_value, timestamp) -- UIs revisit the same events
+        self._before_state_cached = lru_cache(maxsize=1024)(self._get_row_state_before_event)
+        # PERFORMANCE FIX: One read-only connection per thread, reused across
+        # calls so SQLite's page cache stays warm (see close()). Every connection
+        # is also registered so close() can close those of other threads too.
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._generation = 0
+        if self.db_path:
+            self.ensure_indexes()
 
     def _connect(self):
-        """Helper to establish a new database connection."""
+        """Helper returning this thread's read-only connection, opening it on first use."""
         if not self.db_path:
             return None
+        conn = getattr(self._local, 'conn', None)
+        # A connection from before the last close() has been closed already
+        if conn is not None and self._local.generation == self._generation:
+            return conn
         try:
             uri = f"file:{self.db_path}?mode=ro"
-            conn = sqlite3.connect(uri, uri=True)
+            # Repeated analyzer queries hit the statement cache instead of re-preparing.
+            # Each connection is only used by its own thread, but close() may run on another.
+            conn = sqlite3.connect(uri, uri=True, cached_statements=512, check_same_thread=False)
             conn.row_factory = sqlite3.Row
+            for pragma in _READ_PRAGMAS:
+                conn.execute(pragma)
+            with self._connections_lock:
+                self._connections.append(conn)
+                self._local.generation = self._generation
+            self._local.conn = conn
             return conn
         except sqlite3.Error as e:
             print(f"[ANALYZER-ERROR] Failed to connect to database '{self.db_path}': {e}")
             return None
 
-    def get_all_tables(self):
-        conn = self._connect()
-        if not conn: return []
+    def ensure_indexes(self):
+        """
+        PERFORMANCE FIX: Create the event_log indexes used by the analyzer queries.
+
+        Opens the database read-write once; read-only or foreign databases are
+        left untouched.
+
+        Returns:
+            bool: True if the indexes exist after the call
+        """
+        try:
+            conn = sqlite3.connect(f"file:{self.db_path}?mode=rw", uri=True)
+        except sqlite3.Error:
+            return False
         try:
-            cursor = conn.cursor()
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name != 'event_log';")
-            return [row[0] for row in cursor.fetchall()]
+            for index_name, columns in _EVENT_LOG_INDEXES:
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON event_log({columns})")
+            conn.commit()
+            return True
+        except sqlite3.Error:
+            return False
         finally:
             conn.close()
 
+    def invalidate_cache(self):
+        """Drops cached events, DAGs and diff states so the next query re-reads the database."""
+        self._events_cache = None
+        self._event_pks = None
+        self._cache_valid = False
+        self._dag_cache.clear()
+        self._children_cache.clear()
+        self._before_state_cached.cache_clear()
+
+    def get_all_tables(self):
+        conn = self._connect()
+        if not conn: return []
+        cursor = conn.cursor()
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name != 'event_log';")
+        return [row[0] for row in cursor.fetchall()]
+
     def get_all_events(self, use_cache=True):
         """
         PERFORMANCE FIX: Cache events to avoid O(N^2) complexity
@@ -47,92 +159,122 @@ class TraceAnalyzer:
         conn = self._connect()
         if not conn: return []
         
-        try:
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM event_log ORDER BY timestamp")
-            
-            all_events = []
-            for row in cursor.fetchall():
-                event = dict(row)
-                event['payload'] = json.loads(event['payload'])
-                event['action_display'] = f"{event['action']} on {event['table_name'].split('_',1)[1]}"
-                all_events.append(event)
-            
-            # Cache the results
-            self._events_cache = all_events
-            self._cache_valid = True
-            return all_events
-        finally:
-            conn.close()
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        cursor.execute(f"{_EVENT_SELECT} ORDER BY timestamp")
+        
+        # Iterate the cursor so raw rows are released as they are decoded
+        all_events = [self._decode_event(row) for row in cursor]
+        
+        # Cache the results
+        self._events_cache = all_events
+        self._event_pks = [self._row_pk(event) for event in all_events]
+        self._cache_valid = True
+        return all_events
+
+    @staticmethod
+    def _decode_event(row):
+        """Converts an _EVENT_SELECT row tuple into an event dict with a decoded payload."""
+        event = dict(zip(_EVENT_COLUMNS, row))
+        event['payload'] = _json_loads(event['payload'])
+        # 'SYSTEM'/'FAULT' rows have no component prefix; label them by the whole name
+        event['action_display'] = f"{event['action']} on {(event['table_name'] or '').split('_', 1)[-1]}"
+        return event
+
+    @staticmethod
+    def _row_pk(event):
+        """Canonical key of the row an event touches, so cached lookups compare plain strings."""
+        payload = event['payload']
+        pk_val = ''
+        if isinstance(payload, dict):
+            if event['action'] == 'CREATE':
+                pk_val = payload.get('id', '')
+            elif event['action'] == 'UPDATE':
+                pk_val = (payload.get('where') or {}).get('id', '')
+        return str(pk_val).strip()
 
     def get_history_for_field(self, table_name, pk_value):
         """
-        Gets the history for a specific row by fetching all events and then filtering.
-        This is now guaranteed to get fresh data.
+        Gets the history (CREATE/UPDATE events) for a specific row.
+
+        PERFORMANCE FIX: Table and primary key are both matched in SQL, the key
+        via json_extract, so only the row's own payloads are fetched and decoded.
         """
-        # 1. Get a fresh, complete list of all events for the simulation.
-        all_events = self.get_all_events()
-        if not all_events:
-            return []
+        conn = self._connect()
+        if not conn: return []
 
-        # 2. Filter this fresh list based on the specific primary key.
-        PK_COLUMN_NAME = 'id'
-        history = []
-        
-        for event in all_events:
-            if event.get('table_name') != table_name:
-                continue
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        cursor.execute(f"""
+            {_EVENT_SELECT}
+            WHERE table_name = ?
+              AND action IN ('CREATE', 'UPDATE')
+              AND {_ROW_PK_SQL} = ?
+            ORDER BY timestamp
+        """, (table_name, str(pk_value).strip()))
 
-            action = event.get('action')
-            payload = event.get('payload', {})
-            
-            if action == 'CREATE':
-                created_id = str(payload.get(PK_COLUMN_NAME, '')).strip()
-                if created_id == str(pk_value).strip():
-                    history.append(event)
-            
-            elif action == 'UPDATE':
-                where_clause = payload.get('where', {})
-                updated_id = str(where_clause.get(PK_COLUMN_NAME, '')).strip()
-                if updated_id == str(pk_value).strip():
-                    history.append(event)
-
-        return history
+        return [self._decode_event(row) for row in cursor]
 
     def _get_row_state_before_event(self, table_name, pk_value, event_timestamp):
-        """PERFORMANCE FIX: Use SQL WHERE to filter instead of Python loops"""
-        PK_COLUMN_NAME = 'id'
-        row_state = {}
+        """
+        PERFORMANCE FIX: Match the primary key in SQL with json_extract and let
+        SQLite aggregate the row's update objects into one JSON array, so Python
+        decodes two strings per lookup no matter how long the row's history is.
+        """
+        timestamp = _timestamp_param(event_timestamp)
+        target = str(pk_value).strip()
+        
+        # A warm, modest event cache already holds decoded payloads; folding it
+        # in Python beats a round-trip. Large logs stay on the indexed query.
+        if (self._cache_valid and self._events_cache is not None
+                and len(self._events_cache) <= _CACHE_SCAN_LIMIT):
+            return self._row_state_from_cache(table_name, target, timestamp)
         
         conn = self._connect()
         if not conn:
-            return row_state
+            return {}
         
-        try:
-            cursor = conn.cursor()
-            # PERFORMANCE: Filter in SQL instead of fetching all events
-            cursor.execute("""
-                SELECT * FROM event_log 
-                WHERE timestamp < ? AND table_name = ?
-                ORDER BY timestamp
-            """, (event_timestamp, table_name))
-            
-            for row in cursor.fetchall():
-                event = dict(row)
-                payload = json.loads(event['payload'])
-                action = event['action']
-                
-                if action == 'CREATE':
-                    if str(payload.get(PK_COLUMN_NAME, '')).strip() == str(pk_value).strip():
-                        row_state = payload
-                elif action == 'UPDATE':
-                    where_clause = payload.get('where', {})
-                    if str(where_clause.get(PK_COLUMN_NAME, '')).strip() == str(pk_value).strip():
-                        row_state.update(payload.get('update', {}))
-            
-            return row_state
-        finally:
-            conn.close()
+        cursor = conn.cursor()
+        # The latest CREATE resets the row, so only UPDATEs from then on count.
+        cursor.execute(f"""
+            WITH last_create AS (
+                SELECT timestamp, payload FROM event_log
+                WHERE table_name = ? AND action = 'CREATE' AND timestamp < ?
+                  AND {_ROW_PK_SQL} = ?
+                ORDER BY timestamp DESC LIMIT 1
+            )
+            SELECT
+                (SELECT payload FROM last_create) AS create_payload,
+                (SELECT json_group_array(json(upd)) FROM (
+                    SELECT json_extract(payload, '$.update') AS upd FROM event_log
+                    WHERE table_name = ? AND action = 'UPDATE' AND timestamp < ?
+                      AND {_ROW_PK_SQL} = ?
+                      AND timestamp >= coalesce((SELECT timestamp FROM last_create), '')
+                    ORDER BY timestamp
+                )) AS updates
+        """, (table_name, timestamp, target, table_name, timestamp, target))
+        create_payload, updates = cursor.fetchone()
+        
+        row_state = _json_loads(create_payload) if create_payload is not None else {}
+        for update in _json_loads(updates):
+            if update:
+                row_state.update(update)
+        return row_state
+
+    def _row_state_from_cache(self, table_name, target, timestamp):
+        """Folds the cached (timestamp-ordered) events of one row up to timestamp."""
+        row_state = {}
+        for event, pk in zip(self._events_cache, self._event_pks):
+            if event['timestamp'] >= timestamp:
+                break
+            if pk != target or event['table_name'] != table_name:
+                continue
+            action = event['action']
+            if action == 'CREATE':
+                row_state = dict(event['payload'])
+            elif action == 'UPDATE':
+                row_state.update(event['payload'].get('update') or {})
+        return row_state
 
     def get_diff_for_event(self, event):
         action = event['action']
@@ -145,91 +287,153 @@ class TraceAnalyzer:
             table_name = event['table_name']
             where_clause = payload.get('where', {})
             pk_value = where_clause.get(PK_COLUMN_NAME)
-            
+        
             if not pk_value:
                 return {}, payload.get('update')
 
-            before_state = self._get_row_state_before_event(table_name, pk_value, event['timestamp'])
+            # Copy so callers cannot mutate the cached state
+            before_state = dict(self._before_state_cached(
+                table_name, str(pk_value).strip(), _timestamp_param(event['timestamp'])))
             after_state = payload.get('update', {})
-            
+        
             return before_state, after_state
         
         return None, None
         
+    @staticmethod
+    def _scan_table(cursor, table):
+        """Runs SELECT * on a table, quoting its name as an SQL identifier."""
+        quoted = '"' + table.replace('"', '""') + '"'
+        return cursor.execute(f"SELECT * FROM {quoted}")
+
     def get_state_at_timestamp(self, target_timestamp):
+        """
+        Reconstructs the rows of every table as they were at target_timestamp.
+
+        PERFORMANCE FIX: Replays each table's events up to the target with one
+        indexed query instead of walking every later event in reverse.
+
+        Rows with a CREATE event are rebuilt from it, so later UPDATEs are fully
+        reverted. Rows seeded from the scenario's initial state have no CREATE
+        event and UPDATE payloads carry no before-image, so such rows start from
+        their current values: a column last set by an UPDATE at or before the
+        target gets that value back, but a column changed only by UPDATEs after
+        the target keeps its final value (its seed value is not in the log).
+        """
         conn = self._connect()
         if not conn: return {}
-        try:
-            cursor = conn.cursor()
-            current_state = {}
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name != 'event_log';")
-            all_tables = [row[0] for row in cursor.fetchall()]
-
-            for table in all_tables:
-                current_state[table] = {}
-                cursor.execute(f"SELECT * FROM {table}")
-                for row in cursor.fetchall():
-                    if 'id' in row.keys():
-                        current_state[table][row['id']] = dict(row)
-
-            all_events = self.get_all_events()
-            for event in reversed(all_events):
-                if event['timestamp'] <= target_timestamp:
-                    break 
-                table = event['table_name']
-                payload = event['payload']
-                if event['action'] == 'CREATE':
-                    pk_val = payload.get('id')
-                    if pk_val in current_state.get(table, {}):
-                        del current_state[table][pk_val]
-            return current_state
-        finally:
-            conn.close()
+        cursor = conn.cursor()
+        current_state = {}
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name != 'event_log';")
+        all_tables = [row[0] for row in cursor.fetchall()]
+        target_timestamp = _timestamp_param(target_timestamp)
+
+        for table in all_tables:
+            rows = {}
+            for row in self._scan_table(cursor, table):
+                if 'id' in row.keys():
+                    rows[row['id']] = dict(row)
+
+            # Rows created after the target did not exist yet
+            cursor.execute("""
+                SELECT json_extract(payload, '$.id') FROM event_log
+                WHERE table_name = ? AND action = 'CREATE' AND timestamp > ?
+            """, (table, target_timestamp))
+            for (pk_val,) in cursor:
+                rows.pop(pk_val, None)
+
+            cursor.execute("""
+                SELECT action,
+                       CASE action WHEN 'CREATE' THEN json_extract(payload, '$.id')
+                                   ELSE json_extract(payload, '$.where.id') END AS pk,
+                       CASE action WHEN 'CREATE' THEN payload
+                                   WHEN 'UPDATE' THEN json_extract(payload, '$.update') END AS state
+                FROM event_log
+                WHERE table_name = ? AND timestamp <= ?
+                  AND action IN ('CREATE', 'UPDATE', 'DELETE')
+                ORDER BY timestamp
+            """, (table, target_timestamp))
+            for action, pk_val, state in cursor:
+                if action == 'CREATE':
+                    rows[pk_val] = _json_loads(state)
+                elif action == 'UPDATE':
+                    if pk_val in rows and state is not None:
+                        rows[pk_val].update(_json_loads(state))
+                else:
+                    rows.pop(pk_val, None)
+
+            current_state[table] = rows
+        return current_state
     
-    def get_trace_as_dag(self, correlation_id=None):
+    def get_trace_as_dag(self, correlation_id=None, topology_only=False):
         """
         Returns the event trace as a DAG structure.
         
+        Args:
+            correlation_id: Restrict the DAG to one transaction (None = all events)
+            topology_only: If True, nodes only carry 'event_id' and 'causation_id'
+                (enough for chain/critical-path traversal; skips the actions list)
+        
         Returns:
             dict: {
                 'nodes': [{'event_id': str, 'handler': str, 'component': str, 'timestamp': str, ...}],
                 'edges': [{'from': event_id, 'to': event_id}, ...]
             }
+            The DAG is a copy, so callers may modify it without affecting the cache.
         """
+        dag = self._get_dag(correlation_id, topology_only)
+        nodes = [dict(node, actions=[dict(action) for action in node['actions']]) if 'actions' in node
+                 else dict(node) for node in dag['nodes']]
+        return {'nodes': nodes, 'edges': [dict(edge) for edge in dag['edges']]}
+
+    def _get_dag(self, correlation_id=None, topology_only=False):
+        """Returns the cached DAG of get_trace_as_dag(), shared between calls (do not modify)."""
+        cache_key = (correlation_id, topology_only)
+        if cache_key in self._dag_cache:
+            return self._dag_cache[cache_key]
+        
         conn = self._connect()
         if not conn:
             return {'nodes': [], 'edges': []}
         
-        try:
-            cursor = conn.cursor()
-            
-            # Build query based on whether we're filtering by correlation_id
-            if correlation_id:
-                query = """
-                    SELECT DISTINCT event_id, timestamp, correlation_id, causation_id, 
-                           component, handler_name, trigger_message, table_name, action
-                    FROM event_log 
-                    WHERE correlation_id = ?
-                    ORDER BY timestamp
-                """
-                cursor.execute(query, (correlation_id,))
-            else:
-                query = """
-                    SELECT DISTINCT event_id, timestamp, correlation_id, causation_id, 
-                           component, handler_name, trigger_message, table_name, action
-                    FROM event_log 
-                    ORDER BY timestamp
-                """
-                cursor.execute(query)
-            
-            rows = cursor.fetchall()
-            
-            # Build nodes (group by event_id since one event can have multiple writes)
-            nodes_dict = {}
-            for row in rows:
-                event_id = row['event_id']
+        cursor = conn.cursor()
+        
+        if topology_only:
+            columns = "event_id, causation_id"
+        else:
+            columns = """DISTINCT event_id, timestamp, correlation_id, causation_id, 
+                       component, handler_name, trigger_message, table_name, action"""
+        
+        # Build query based on whether we're filtering by correlation_id
+        if correlation_id:
+            query = f"""
+                SELECT {columns}
+                FROM event_log 
+                WHERE correlation_id = ?
+                ORDER BY timestamp
+            """
+            cursor.execute(query, (correlation_id,))
+        else:
+            query = f"""
+                SELECT {columns}
+                FROM event_log 
+                ORDER BY timestamp
+            """
+            cursor.execute(query)
+        
+        # Build nodes (group by event_id since one event can have multiple writes)
+        # Stream rows from the cursor instead of materializing them with fetchall()
+        nodes_dict = {}
+        if topology_only:
+            for event_id, causation_id in cursor:
                 if event_id not in nodes_dict:
-                    nodes_dict[event_id] = {
+                    nodes_dict[event_id] = {'event_id': event_id, 'causation_id': causation_id}
+        else:
+            for row in cursor:
+                event_id = row['event_id']
+                node = nodes_dict.get(event_id)
+                if node is None:
+                    node = nodes_dict[event_id] = {
                         'event_id': event_id,
                         'timestamp': row['timestamp'],
                         'correlation_id': row['correlation_id'],
@@ -240,27 +444,42 @@ class TraceAnalyzer:
                         'actions': []
                     }
                 # Add action to this event
-                nodes_dict[event_id]['actions'].append({
+                node['actions'].append({
                     'table': row['table_name'],
                     'action': row['action']
                 })
-            
-            nodes = list(nodes_dict.values())
-            
-            # Build edges from causation relationships
-            edges = []
-            for node in nodes:
-                if node['causation_id']:  # If this event has a parent
-                    edges.append({
-                        'from': node['causation_id'],
-                        'to': node['event_id']
-                    })
-            
-            return {'nodes': nodes, 'edges': edges}
         
-        finally:
-            conn.close()
+        nodes = list(nodes_dict.values())
+        
+        # Build edges from causation relationships
+        edges = []
+        for node in nodes:
+            if node['causation_id']:  # If this event has a parent
+                edges.append({
+                    'from': node['causation_id'],
+                    'to': node['event_id']
+                })
+        
+        dag = {'nodes': nodes, 'edges': edges}
+        self._dag_cache[cache_key] = dag
+        return dag
+        
     
+    @staticmethod
+    def _build_children(edges):
+        """Builds a parent event_id -> [child event_ids] map from DAG edges."""
+        children = defaultdict(list)
+        for edge in edges:
+            children[edge['from']].append(edge['to'])
+        return children
+
+    def _get_children(self, correlation_id=None):
+        """Returns the cached children map of the correlation_id's DAG topology."""
+        if correlation_id not in self._children_cache:
+            dag = self._get_dag(correlation_id, topology_only=True)
+            self._children_cache[correlation_id] = self._build_children(dag['edges'])
+        return self._children_cache[correlation_id]
+
     def get_event_chain(self, event_id, direction='backward'):
         """
         Traverse the DAG to get the chain of events.
@@ -272,42 +491,55 @@ class TraceAnalyzer:
         Returns:
             list: List of event_ids in the chain
         """
-        dag = self.get_trace_as_dag()
-        nodes_dict = {n['event_id']: n for n in dag['nodes']}
+        return self.get_event_chains([event_id], direction)[event_id]
+    
+    def get_event_chains(self, event_ids, direction='backward'):
+        """
+        Batch version of get_event_chain: the DAG and its parent/children maps
+        are built once and shared by every walk.
         
-        if event_id not in nodes_dict:
-            return []
+        Args:
+            event_ids: Iterable of starting events
+            direction: 'backward' (ancestors) or 'forward' (descendants)
         
-        chain = []
-        visited = set()
+        Returns:
+            dict: {event_id: [event_ids in the chain]} (empty list for unknown events)
+        """
+        dag = self._get_dag(topology_only=True)
+        parents = {n['event_id']: n['causation_id'] for n in dag['nodes']}
+        children = self._get_children() if direction != 'backward' else None
         
-        def traverse_backward(eid):
-            if eid in visited:
-                return
-            visited.add(eid)
-            chain.append(eid)
-            
-            node = nodes_dict.get(eid)
-            if node and node['causation_id']:
-                traverse_backward(node['causation_id'])
-        
-        def traverse_forward(eid):
-            if eid in visited:
-                return
-            visited.add(eid)
-            chain.append(eid)
+        chains = {}
+        for event_id in event_ids:
+            if event_id in chains:
+                continue
+            chain = []
+            chains[event_id] = chain
+            if event_id not in parents:
+                continue
+            visited = set()
             
-            # Find all children
-            for edge in dag['edges']:
-                if edge['from'] == eid:
-                    traverse_forward(edge['to'])
-        
-        if direction == 'backward':
-            traverse_backward(event_id)
-        else:
-            traverse_forward(event_id)
+            # PERFORMANCE FIX: Explicit stack loops instead of recursive closures,
+            # so deep causation chains cannot hit the recursion limit.
+            if direction == 'backward':
+                eid = event_id
+                while eid and eid not in visited:
+                    visited.add(eid)
+                    chain.append(eid)
+                    eid = parents.get(eid)
+            else:
+                # Adjacency lookup instead of scanning all edges per node; children
+                # are pushed reversed to keep the pre-order of the recursive version.
+                stack = [event_id]
+                while stack:
+                    eid = stack.pop()
+                    if eid in visited:
+                        continue
+                    visited.add(eid)
+                    chain.append(eid)
+                    stack.extend(reversed(children.get(eid, ())))
         
-        return chain
+        return chains
     
     def get_critical_path(self, correlation_id):
         """
@@ -317,41 +549,56 @@ class TraceAnalyzer:
         Returns:
             list: List of event_ids representing the critical path
         """
-        dag = self.get_trace_as_dag(correlation_id)
+        dag = self._get_dag(correlation_id, topology_only=True)
         
         if not dag['nodes']:
             return []
         
-        nodes_dict = {n['event_id']: n for n in dag['nodes']}
-        
         # Find root nodes (no causation_id)
         roots = [n['event_id'] for n in dag['nodes'] if not n['causation_id']]
         
         if not roots:
             return []
         
-        # DFS to find longest path
-        longest_path = []
+        # PERFORMANCE FIX: Longest path via one sweep in reverse topological
+        # order over a precomputed adjacency map (O(N+E), no recursion).
+        children = self._get_children(correlation_id)
+        indegree = {n['event_id']: 0 for n in dag['nodes']}
+        for edge in dag['edges']:
+            indegree[edge['to']] += 1
         
-        def dfs(event_id, current_path):
-            nonlocal longest_path
-            current_path = current_path + [event_id]
-            
-            # Find children
-            children = [e['to'] for e in dag['edges'] if e['from'] == event_id]
-            
-            if not children:  # Leaf node
-                if len(current_path) > len(longest_path):
-                    longest_path = current_path
-            else:
-                for child in children:
-                    dfs(child, current_path)
+        # Kahn's algorithm; timestamp order alone is not safe for equal timestamps
+        order = [eid for eid, degree in indegree.items() if degree == 0]
+        for eid in order:
+            for child in children.get(eid, ()):
+                indegree[child] -= 1
+                if indegree[child] == 0:
+                    order.append(child)
         
-        for root in roots:
-            dfs(root, [])
+        # depth[eid] = number of events on the longest path starting at eid;
+        # next_hop keeps the first deepest child to match DFS tie-breaking.
+        depth = {}
+        next_hop = {}
+        for eid in reversed(order):
+            best = 0
+            for child in children.get(eid, ()):
+                if depth.get(child, 0) > best:
+                    best = depth[child]
+                    next_hop[eid] = child
+            depth[eid] = best + 1
+        
+        start = max(roots, key=lambda eid: depth.get(eid, 0))
+        longest_path = [start]
+        while longest_path[-1] in next_hop:
+            longest_path.append(next_hop[longest_path[-1]])
         
         return longest_path
 
     def close(self):
-        """Close any open connections (no-op for stateless design)"""
-        pass
+        """Close the cached connections of all threads (each reopens on its next query)."""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+            self._generation += 1
+        for conn in connections:
+            conn.close()
+        self._local.conn = None
@@ -6,11 +6,12 @@ Tracks unique states visited across simulations for reliability scoring
 """
 import hashlib
 import json
-from typing import Set, Dict, Optional
+import math
+from typing import Set, Dict, Optional, Iterable, Union
 from dataclasses import dataclass
 
 
-@dataclass
+@dataclass(slots=True)
 class CoverageStats:
     """Statistics about state space coverage"""
     unique_states: int
@@ -18,35 +19,72 @@ class CoverageStats:
     coverage_rate: float  # unique / total
 
 
+_SQRT_10 = math.sqrt(10)
+
+
+def _as_digest(state_fingerprint: Union[str, bytes]) -> bytes:
+    """Raw digest for a fingerprint given as bytes or hex (other strings are UTF-8 encoded)"""
+    if isinstance(state_fingerprint, bytes):
+        return state_fingerprint
+    try:
+        return bytes.fromhex(state_fingerprint)
+    except ValueError:
+        return state_fingerprint.encode('utf-8')
+
+
 class CoverageTracker:
     """
     Tracks state fingerprints across multiple simulation runs.
     
-    State Fingerprint: SHA-256 hash of all component states at a point in time.
+    State Fingerprint: 256-bit BLAKE2b hash of all component states at a point in time.
     Used to measure state space exploration in Chaos Matrix testing.
     """
     
     def __init__(self):
-        self.state_fingerprints: Set[str] = set()
+        # PERFORMANCE FIX: Raw digests (32 bytes) instead of 64-char hex strings
+        self.state_fingerprints: Set[bytes] = set()
         self.observation_count: int = 0
     
-    def add_state(self, state_fingerprint: str) -> bool:
+    def add_state(self, state_fingerprint: Union[str, bytes]) -> bool:
         """
         Add a state fingerprint to the tracker.
         
         Args:
-            state_fingerprint: SHA-256 hash of system state
+            state_fingerprint: Hash of system state, as raw bytes or a hex string
+                (other strings are stored UTF-8 encoded)
             
         Returns:
             True if this is a NEW unique state, False if already seen
         """
         self.observation_count += 1
-        is_new = state_fingerprint not in self.state_fingerprints
         
-        if is_new:
-            self.state_fingerprints.add(state_fingerprint)
+        # PERFORMANCE FIX: One hash probe: add() is a no-op for seen states, so the
+        # size change tells whether the state is new (no separate "in" lookup)
+        seen = self.state_fingerprints
+        unique_before = len(seen)
+        seen.add(_as_digest(state_fingerprint))
+        
+        return len(seen) != unique_before
+    
+    def add_states(self, state_fingerprints: Iterable[Union[str, bytes]]) -> int:
+        """
+        Add many state fingerprints at once (e.g. all of one run's).
+        
+        Args:
+            state_fingerprints: Hashes of system states, as for add_state
+            
+        Returns:
+            Number of them that were NEW unique states
+        """
+        digests = list(map(_as_digest, state_fingerprints))
+        self.observation_count += len(digests)
+        
+        # PERFORMANCE FIX: set.update() inserts the whole batch in C
+        seen = self.state_fingerprints
+        unique_before = len(seen)
+        seen.update(digests)
         
-        return is_new
+        return len(seen) - unique_before
     
     def get_coverage_stats(self) -> CoverageStats:
         """
@@ -89,11 +127,10 @@ class CoverageTracker:
         # where V = unique states, N = observations, K and β are constants
         # For distributed systems, β typically ranges from 0.4 to 0.6
         
-        beta = 0.5  # Conservative middle estimate
-        k = unique / (self.observation_count ** beta)
-        
-        # Estimate we need to observe ~10x current to reach 95% coverage
-        estimated_total = int(k * ((self.observation_count * 10) ** beta))
+        # β = 0.5 (conservative middle estimate), projected to ~10x current observations
+        # for 95% coverage. PERFORMANCE FIX: N cancels out of K * (10N)^β with K = U / N^β,
+        # leaving U * sqrt(10)
+        estimated_total = int(unique * _SQRT_10)
         
         return max(estimated_total, unique)  # At least what we've seen
     
@@ -113,7 +150,7 @@ class CoverageTracker:
 
 def compute_state_fingerprint(component_states: Dict[str, Dict]) -> str:
     """
-    Compute SHA-256 fingerprint of all component states.
+    Compute a 256-bit BLAKE2b fingerprint of all component states.
     
     Args:
         component_states: Dict mapping table_name -> {rows as dicts}
@@ -123,12 +160,78 @@ def compute_state_fingerprint(component_states: Dict[str, Dict]) -> str:
         }
     
     Returns:
-        Hex string of SHA-256 hash (64 characters)
+        Hex string of the hash (64 characters)
     """
     # Convert to canonical JSON (sorted keys, no whitespace)
     canonical_json = json.dumps(component_states, sort_keys=True, separators=(',', ':'))
     
-    # Compute SHA-256 hash
-    hash_obj = hashlib.sha256(canonical_json.encode('utf-8'))
+    # PERFORMANCE FIX: One BLAKE2b call over the whole buffer; faster than SHA-256
+    # on CPUs without SHA extensions, with the same 64-character hex output
+    hash_obj = hashlib.blake2b(canonical_json.encode('utf-8'), digest_size=32)
     
     return hash_obj.hexdigest()
+
+
+
+_DIGEST_MASK = 0xFFFFFFFFFFFFFFFF
+
+
+def _row_hash(row: tuple) -> int:
+    """64-bit BLAKE2b hash of one row"""
+    return int.from_bytes(hashlib.blake2b(repr(row).encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+class RowsDigest:
+    """
+    Running order-independent digest of a table's rows.
+    
+    Rows are independent fragments of the digest, so a change to one row costs
+    one remove_row/add_row pair instead of rehashing the whole table.
+    hexdigest() matches compute_rows_digest() over the same rows.
+    """
+    
+    __slots__ = ('acc', 'count')
+    
+    def __init__(self, rows: Iterable[tuple] = ()):
+        self.acc = 0
+        self.count = 0
+        for row in rows:
+            self.add_row(row)
+    
+    def add_row(self, row: tuple):
+        """Fold a row into the digest"""
+        self.acc = (self.acc + _row_hash(row)) & _DIGEST_MASK
+        self.count += 1
+    
+    def remove_row(self, row: tuple):
+        """Take a previously added row back out of the digest"""
+        self.acc = (self.acc - _row_hash(row)) & _DIGEST_MASK
+        self.count -= 1
+    
+    def update_row(self, old_row: tuple, new_row: tuple):
+        """Replace a row's old values with its new ones"""
+        self.remove_row(old_row)
+        self.add_row(new_row)
+    
+    def hexdigest(self) -> str:
+        """Digest as <row count>:<16 hex digits>, as compute_rows_digest returns"""
+        return f"{self.count}:{self.acc:016x}"
+
+
+def compute_rows_digest(rows: Iterable[tuple]) -> str:
+    """
+    Compute an order-independent digest of a table's rows.
+    
+    Each row is hashed on its own and the 64-bit row hashes are summed, so the
+    result does not depend on row order and needs no sorted copy of the table.
+    Duplicate rows still count (unlike XOR, a sum does not cancel them).
+    Use RowsDigest to maintain the same digest incrementally.
+    
+    Args:
+        rows: Row tuples of plain SQLite values (str, int, float, bytes, None)
+    
+    Returns:
+        Hex string "<row count>:<16 hex digits>"
+    """
+    hashes = list(map(_row_hash, rows))
+    return f"{len(hashes)}:{sum(hashes) & _DIGEST_MASK:016x}"
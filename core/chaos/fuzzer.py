@@ -11,13 +11,65 @@ Fuzzing Types:
 """
 
 import random
-import copy
 import json
+import itertools
 from typing import Dict, List, Any, Optional
 from dataclasses import dataclass
 
 
-@dataclass
+# PERFORMANCE FIX: Candidate values are module-level tuples instead of a list literal
+# rebuilt on every fuzzed value
+_INT_BOUNDARIES = (
+    0,           # Zero
+    -1,          # Negative boundary
+    1,           # Positive boundary
+    2**31 - 1,   # MAX_INT (32-bit)
+    -2**31,      # MIN_INT (32-bit)
+    2**63 - 1,   # MAX_LONG (64-bit)
+)
+_FLOAT_BOUNDARIES = (
+    0.0,
+    -0.0,
+    float('inf'),
+    float('-inf'),
+    # float('nan'),  # NaN can cause issues, commented out
+)
+_STR_BOUNDARIES = (
+    "",              # Empty string
+    " ",             # Whitespace
+    "\n\t",          # Special chars
+    "NULL",          # SQL injection attempt
+    "0",             # Numeric string
+    "true",          # Boolean string
+)
+_BOOL_CONFUSIONS = {
+    True: (1, "true"),    # Bool → Int, Bool → String
+    False: (0, "false"),
+}
+_RECORD_NUMERIC_BOUNDARIES = (0, -1, 1, 1000000)
+_LOWERCASE = 'abcdefghijklmnopqrstuvwxyz'
+# zip_longest padding; distinct from any real step (steps may themselves be None)
+_MISSING_STEP = object()
+
+
+def _bands(*probs: float) -> tuple:
+    """
+    Cumulative thresholds for a chain of "if rng.random() < p" checks.
+    
+    A single draw r selects strategy i when r < bands[i] (first match), with
+    the same probabilities as drawing once per check in sequence.
+    """
+    bands = []
+    reached = 1.0  # Probability that the chain gets this far
+    acc = 0.0
+    for p in probs:
+        acc += reached * p
+        reached *= 1.0 - p
+        bands.append(acc)
+    return tuple(bands)
+
+
+@dataclass(slots=True)
 class FuzzingConfig:
     """Configuration for fuzzing behavior"""
     fuzz_inputs: bool = True
@@ -44,8 +96,29 @@ class InputFuzzer:
     def __init__(self, config: FuzzingConfig):
         self.config = config
         # CRITICAL FIX: Use private Random instance to avoid thread pollution
-        seed = config.seed if config.seed is not None else self.rng.randint(0, 2**32 - 1)
+        seed = config.seed if config.seed is not None else random.randint(0, 2**32 - 1)
         self.rng = random.Random(seed)
+        # PERFORMANCE FIX: One RNG draw per fuzzed value picks the strategy from these bands
+        b, t, e = config.boundary_value_prob, config.type_confusion_prob, config.extreme_value_prob
+        self._int_bands = _bands(b, t, e)
+        self._float_bands = _bands(b, t)
+        self._str_bands = _bands(b, t, e)
+        self._bool_bands = _bands(t)
+        self._list_bands = _bands(b, e)
+        self._extreme_prob = e
+        # Null band, and the factor rescaling a non-null draw back to [0, 1)
+        self._null_prob = config.null_prob
+        self._null_rescale = 1.0 / (1.0 - config.null_prob) if config.null_prob < 1 else 0.0
+        # PERFORMANCE FIX: Exact-type dispatch is one dict lookup instead of an isinstance chain
+        # (and type(True) is bool, so booleans never reach the int handler)
+        self._dispatch = {
+            bool: self._fuzz_boolean,
+            int: self._fuzz_integer,
+            float: self._fuzz_float,
+            str: self._fuzz_string,
+            list: self._fuzz_list,
+            dict: self._fuzz_dict,
+        }
     
     def fuzz_payload(self, payload: Dict[str, Any], schema: Optional[Dict] = None) -> Dict[str, Any]:
         """
@@ -61,110 +134,94 @@ class InputFuzzer:
         if not self.config.fuzz_inputs:
             return payload
         
-        fuzzed = copy.deepcopy(payload)
+        # PERFORMANCE FIX: Fuzzed values are replaced, never mutated in place,
+        # so a shallow copy is enough (nested dicts are copied by recursion)
+        fuzzed = dict(payload)
         
+        # PERFORMANCE FIX: One getrandbits() call draws every field's coin flip up front
+        # instead of one rng.random() call per field
+        coin_flips = self.rng.getrandbits(len(fuzzed)) if fuzzed else 0
         for key, value in fuzzed.items():
             # Decide whether to fuzz this field
-            if self.rng.random() < 0.5:  # 50% chance to fuzz each field
+            if coin_flips & 1:  # 50% chance to fuzz each field
                 fuzzed[key] = self._fuzz_value(value, key)
+            coin_flips >>= 1
         
         return fuzzed
     
     def _fuzz_value(self, value: Any, key: str) -> Any:
         """Fuzz a single value"""
+        r = self.rng.random()
         
         # Null injection
-        if self.rng.random() < self.config.null_prob:
+        null_prob = self._null_prob
+        if r < null_prob:
             return None
+        # The same draw, rescaled to [0, 1), picks the type-specific strategy
+        if null_prob > 0:
+            r = (r - null_prob) * self._null_rescale
         
-        # Type-based fuzzing (bool must be checked before int!)
-        if isinstance(value, bool):
-            return self._fuzz_boolean(value)
-        elif isinstance(value, int):
-            return self._fuzz_integer(value, key)
-        elif isinstance(value, float):
-            return self._fuzz_float(value)
-        elif isinstance(value, str):
-            return self._fuzz_string(value, key)
-        elif isinstance(value, list):
-            return self._fuzz_list(value)
-        elif isinstance(value, dict):
-            return self.fuzz_payload(value)
-        
-        return value
+        # Type-based fuzzing
+        handler = self._dispatch.get(type(value))
+        return handler(value, key, r) if handler else value
     
-    def _fuzz_integer(self, value: int, key: str) -> Any:
-        """Fuzz integer values"""
+    def _fuzz_integer(self, value: int, key: str, r: float) -> Any:
+        """Fuzz integer values; r is the strategy draw"""
+        boundary, confusion, extreme = self._int_bands
         
         # Boundary values
-        if self.rng.random() < self.config.boundary_value_prob:
-            return self.rng.choice([
-                0,           # Zero
-                -1,          # Negative boundary
-                1,           # Positive boundary
-                2**31 - 1,   # MAX_INT (32-bit)
-                -2**31,      # MIN_INT (32-bit)
-                2**63 - 1,   # MAX_LONG (64-bit)
-            ])
+        if r < boundary:
+            return self.rng.choice(_INT_BOUNDARIES)
         
         # Type confusion
-        if self.rng.random() < self.config.type_confusion_prob:
+        if r < confusion:
             return str(value)  # Int → String
         
         # Extreme values
-        if self.rng.random() < self.config.extreme_value_prob:
-            return self.rng.choice([
+        if r < extreme:
+            return self.rng.choice((
                 value * 1000000,  # Very large
                 value * -1,       # Negated
                 abs(value),       # Absolute
-            ])
+            ))
         
         # Small random perturbation
         return value + self.rng.randint(-10, 10)
     
-    def _fuzz_float(self, value: float) -> Any:
-        """Fuzz float values"""
+    def _fuzz_float(self, value: float, key: str, r: float) -> Any:
+        """Fuzz float values; r is the strategy draw"""
+        boundary, confusion = self._float_bands
         
         # Boundary values
-        if self.rng.random() < self.config.boundary_value_prob:
-            return self.rng.choice([
-                0.0,
-                -0.0,
-                float('inf'),
-                float('-inf'),
-                # float('nan'),  # NaN can cause issues, commented out
-            ])
+        if r < boundary:
+            return self.rng.choice(_FLOAT_BOUNDARIES)
         
         # Type confusion
-        if self.rng.random() < self.config.type_confusion_prob:
+        if r < confusion:
             return int(value)  # Float → Int
         
         # Small perturbation
         return value * self.rng.uniform(0.5, 2.0)
     
-    def _fuzz_string(self, value: str, key: str) -> Any:
-        """Fuzz string values"""
+    def _fuzz_string(self, value: str, key: str, r: float) -> Any:
+        """Fuzz string values; r is the strategy draw"""
+        boundary, confusion, extreme = self._str_bands
         
         # Boundary values
-        if self.rng.random() < self.config.boundary_value_prob:
-            return self.rng.choice([
-                "",              # Empty string
-                " ",             # Whitespace
-                "\n\t",          # Special chars
-                "NULL",          # SQL injection attempt
-                "0",             # Numeric string
-                "true",          # Boolean string
-            ])
+        if r < boundary:
+            return self.rng.choice(_STR_BOUNDARIES)
         
         # Type confusion (String → Number)
-        if self.rng.random() < self.config.type_confusion_prob:
+        if r < confusion:
             try:
                 return int(value)
             except ValueError:
-                pass
+                # Not numeric: the extreme-length check gets its own draw
+                if self.rng.random() < self._extreme_prob:
+                    return value * 100  # Very long string
         
         # Extreme length
-        if self.rng.random() < self.config.extreme_value_prob:
+        elif r < extreme:
             return value * 100  # Very long string
         
         # Random mutation
@@ -176,32 +233,34 @@ class InputFuzzer:
         
         return value
     
-    def _fuzz_boolean(self, value: bool) -> Any:
-        """Fuzz boolean values"""
+    def _fuzz_boolean(self, value: bool, key: str, r: float) -> Any:
+        """Fuzz boolean values; r is the strategy draw"""
         
         # Type confusion
-        if self.rng.random() < self.config.type_confusion_prob:
-            return self.rng.choice([
-                1 if value else 0,    # Bool → Int
-                "true" if value else "false",  # Bool → String
-            ])
+        if r < self._bool_bands[0]:
+            return self.rng.choice(_BOOL_CONFUSIONS[value])
         
         # Flip
         return not value
     
-    def _fuzz_list(self, value: List) -> List:
-        """Fuzz list values"""
+    def _fuzz_list(self, value: List, key: str, r: float) -> List:
+        """Fuzz list values; r is the strategy draw"""
+        boundary, extreme = self._list_bands
         
         # Empty list
-        if self.rng.random() < self.config.boundary_value_prob:
+        if r < boundary:
             return []
         
         # Very large list
-        if self.rng.random() < self.config.extreme_value_prob:
+        if r < extreme:
             return value * 100
         
         # Fuzz each element
         return [self._fuzz_value(v, "") for v in value]
+    
+    def _fuzz_dict(self, value: Dict, key: str, r: float) -> Dict:
+        """Fuzz nested dicts field by field, like a payload"""
+        return self.fuzz_payload(value)
 
 
 class StateFuzzer:
@@ -220,6 +279,8 @@ class StateFuzzer:
         # CRITICAL FIX: Use private Random instance
         seed = config.seed if config.seed is not None else random.randint(0, 2**32 - 1)
         self.rng = random.Random(seed)
+        # PERFORMANCE FIX: Read once instead of through self.config for every field
+        self._boundary_prob = config.boundary_value_prob
     
     def fuzz_initial_state(self, initial_state: List[Dict]) -> List[Dict]:
         """
@@ -234,10 +295,17 @@ class StateFuzzer:
         if not self.config.fuzz_states:
             return initial_state
         
-        fuzzed = copy.deepcopy(initial_state)
+        # PERFORMANCE FIX: Copy-on-write. Every table's record list is replaced below, so
+        # only the component_state dicts and their 'state' dicts are cloned; untouched
+        # records are never copied and fuzzed ones are shallow-copied by _fuzz_record
+        fuzzed = []
         
-        for component_state in fuzzed:
-            state_data = component_state.get('state', {})
+        for component_state in initial_state:
+            component_state = dict(component_state)
+            fuzzed.append(component_state)
+            if 'state' not in component_state:
+                continue
+            state_data = component_state['state'] = dict(component_state['state'])
             
             for table_name, records in state_data.items():
                 # Empty table
@@ -263,7 +331,8 @@ class StateFuzzer:
     
     def _fuzz_record(self, record: Dict) -> Dict:
         """Fuzz a single database record"""
-        fuzzed = copy.deepcopy(record)
+        # Only top-level scalar fields are replaced, so a shallow copy suffices
+        fuzzed = dict(record)
         
         for key, value in fuzzed.items():
             # Don't fuzz IDs (causes foreign key issues)
@@ -284,8 +353,8 @@ class StateFuzzer:
         """Fuzz numeric fields (balances, quantities)"""
         
         # Boundary values
-        if self.rng.random() < self.config.boundary_value_prob:
-            return self.rng.choice([0, -1, 1, 1000000])
+        if self.rng.random() < self._boundary_prob:
+            return self.rng.choice(_RECORD_NUMERIC_BOUNDARIES)
         
         # Random scale
         return value * self.rng.uniform(0.1, 10.0)
@@ -299,7 +368,7 @@ class StateFuzzer:
         
         # Random string
         if self.rng.random() < 0.1:
-            return ''.join(self.rng.choices('abcdefghijklmnopqrstuvwxyz', k=self.rng.randint(5, 15)))
+            return ''.join(self.rng.choices(_LOWERCASE, k=self.rng.randint(5, 15)))
         
         return value
 
@@ -388,10 +457,8 @@ class ScenarioFuzzer:
         sequences = [s.get('steps', []) for s in scenarios]
         
         # Interleave round-robin
-        max_len = max(len(seq) for seq in sequences)
-        for i in range(max_len):
-            for seq in sequences:
-                if i < len(seq):
-                    combined['steps'].append(seq[i])
+        # PERFORMANCE FIX: zip_longest walks the rows in C; only padding is filtered out
+        rounds = itertools.zip_longest(*sequences, fillvalue=_MISSING_STEP)
+        combined['steps'] = [step for row in rounds for step in row if step is not _MISSING_STEP]
         
         return combined
@@ -5,12 +5,49 @@ M5: Reliability Scoring System
 Computes reliability score (0-100) based on state space coverage
 """
 import math
+import functools
 from dataclasses import dataclass
 from typing import Optional
 from .coverage_tracker import CoverageStats
 
+_SQRT_10 = math.sqrt(10)
 
-@dataclass
+# Wilson interval coefficients per confidence level: (z, z², z²/2, z²/4)
+_WILSON_Z = {
+    level: (z, z * z, z * z / 2, z * z / 4)
+    for level, z in ((0.90, 1.645), (0.95, 1.96), (0.99, 2.576))
+}
+_Z, _Z2, _Z2_HALF, _Z2_QUARTER = _WILSON_Z[0.95]
+
+# log10(1 + x) * k == log1p(x) * (k / ln 10): scales for the state and simulation bonuses
+_STATE_BONUS_COEF = 10.0 / math.log(10)
+_SIM_BONUS_COEF = 5.0 / math.log(10)
+
+# math.exp2 is new in Python 3.11; math.pow still skips the generic ** dispatch
+_exp2 = getattr(math, 'exp2', None) or (lambda x: math.pow(2.0, x))
+
+
+def _capped_score(unique: int, coverage_rate: float, num_simulations: int) -> float:
+    """Coverage-rate base score plus state and simulation bonuses, capped at 100."""
+    # Base score from coverage rate
+    # High coverage rate = many unique states per observation
+    base_score = min(coverage_rate * 100, 100.0)
+    
+    # Bonus for number of unique states discovered
+    # More unique states = more thorough exploration
+    # PERFORMANCE FIX: log1p avoids forming unique + 1 and is exact near zero
+    state_bonus = min(math.log1p(unique) * _STATE_BONUS_COEF, 30)
+    
+    # Bonus for number of simulations run
+    # More simulations = higher confidence
+    sim_bonus = min(math.log1p(num_simulations) * _SIM_BONUS_COEF, 15)
+    
+    # Combined score (capped at 100)
+    raw_score = base_score + state_bonus + sim_bonus
+    return min(raw_score, 100.0)
+
+
+@dataclass(slots=True, frozen=True)
 class ReliabilityScore:
     """
     Reliability score with confidence interval.
@@ -66,34 +103,68 @@ class ReliabilityScorer:
                 estimated_total_states=None
             )
         
-        # Base score from coverage rate
-        # High coverage rate = many unique states per observation
-        base_score = min(coverage.coverage_rate * 100, 100.0)
+        score, ci_lower, ci_upper, estimated_total = ReliabilityScorer._score_kernel(
+            unique, total_obs, coverage.coverage_rate, num_simulations)
         
-        # Bonus for number of unique states discovered
-        # More unique states = more thorough exploration
-        state_bonus = min(math.log10(unique + 1) * 10, 30)
+        return ReliabilityScore(
+            score=score,
+            confidence_lower=ci_lower,
+            confidence_upper=ci_upper,
+            unique_states=unique,
+            total_observations=total_obs,
+            estimated_total_states=estimated_total
+        )
+    
+    @staticmethod
+    def compute_score_only(coverage: CoverageStats, num_simulations: int) -> float:
+        """
+        Compute just the reliability score, for ranking and threshold checks.
         
-        # Bonus for number of simulations run
-        # More simulations = higher confidence
-        sim_bonus = min(math.log10(num_simulations + 1) * 5, 15)
+        PERFORMANCE FIX: Skips the Wilson interval, the Heaps estimate and the
+        ReliabilityScore allocation; use compute_score when bounds are needed.
         
-        # Combined score (capped at 100)
-        raw_score = base_score + state_bonus + sim_bonus
-        score = min(raw_score, 100.0)
+        Args:
+            coverage: CoverageStats from CoverageTracker
+            num_simulations: Number of simulations run
+            
+        Returns:
+            The same value as compute_score(coverage, num_simulations).score
+        """
+        if coverage.unique_states == 0 or coverage.total_observations == 0:
+            return 0.0
+        
+        return round(_capped_score(coverage.unique_states, coverage.coverage_rate, num_simulations), 2)
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def _score_kernel(unique: int, total_obs: int, coverage_rate: float,
+                      num_simulations: int) -> tuple:
+        """
+        Pure arithmetic behind compute_score, for non-empty coverage.
+        
+        PERFORMANCE FIX: Memoized: "run until no new states" loops score the same
+        (unique, observations, simulations) again and again.
         
-        # Compute confidence interval using Wilson score interval
+        Returns:
+            (score, confidence_lower, confidence_upper, estimated_total_states),
+            with the three percentages rounded to 2 decimals
+        """
+        score = _capped_score(unique, coverage_rate, num_simulations)
+        
+        # Compute confidence interval using Wilson score interval (95% confidence)
         # This accounts for sample size - small samples have wider intervals
-        confidence = 0.95
-        z = 1.96  # z-score for 95% confidence
+        # PERFORMANCE FIX: z², z²/2 and z²/4 come precomputed from _WILSON_Z and 1/n is
+        # computed once, so the interval needs a single division and no squaring of z
+        inv_n = 1.0 / total_obs
+        inv_n2 = inv_n * inv_n
         
         # Proportion of unique states
-        p = unique / total_obs
+        p = unique * inv_n
         
         # Wilson score interval formula
-        denominator = 1 + (z**2) / total_obs
-        center = (p + (z**2) / (2 * total_obs)) / denominator
-        margin = (z * math.sqrt((p * (1 - p) / total_obs) + (z**2) / (4 * total_obs**2))) / denominator
+        inv_denominator = 1.0 / (1.0 + _Z2 * inv_n)
+        center = (p + _Z2_HALF * inv_n) * inv_denominator
+        margin = _Z * math.sqrt(p * (1.0 - p) * inv_n + _Z2_QUARTER * inv_n2) * inv_denominator
         
         ci_lower = max(center - margin, 0.0) * 100
         ci_upper = min(center + margin, 1.0) * 100
@@ -101,14 +172,7 @@ class ReliabilityScorer:
         # Estimate total states using Good-Turing method
         estimated_total = ReliabilityScorer._estimate_total_states(unique, total_obs)
         
-        return ReliabilityScore(
-            score=round(score, 2),
-            confidence_lower=round(ci_lower, 2),
-            confidence_upper=round(ci_upper, 2),
-            unique_states=unique,
-            total_observations=total_obs,
-            estimated_total_states=estimated_total
-        )
+        return round(score, 2), round(ci_lower, 2), round(ci_upper, 2), estimated_total
     
     @staticmethod
     def _estimate_total_states(unique: int, total_obs: int) -> Optional[int]:
@@ -123,13 +187,10 @@ class ReliabilityScorer:
         if total_obs < 100:
             return None
         
-        # Use β = 0.5 (conservative middle estimate)
-        beta = 0.5
-        k = unique / (total_obs ** beta)
-        
-        # Project to 10x current observations for 95% coverage estimate
-        projected_obs = total_obs * 10
-        estimated_total = int(k * (projected_obs ** beta))
+        # Use β = 0.5 (conservative middle estimate) and project to 10x current
+        # observations for 95% coverage estimate. PERFORMANCE FIX: with K = U / N^β,
+        # K * (10N)^β = U * sqrt(10), so N drops out
+        estimated_total = int(unique * _SQRT_10)
         
         return max(estimated_total, unique)
     
@@ -176,7 +237,7 @@ class ReliabilityScorer:
         gap = target_score - current_score
         
         # Estimate: need 2^(gap/7) times current simulations
-        multiplier = 2 ** (gap / 7)
+        multiplier = _exp2(gap / 7.0)
         recommended_total = int(current_sims * multiplier)
         
         return max(recommended_total - current_sims, current_sims)  # At least double
@@ -4,7 +4,42 @@
 # Language) YAML file. It acts as a gateway to ensure that the
 # rest of the application deals with well-structured data.
 
-import yaml
+import copy
+import os
+
+# PERFORMANCE FIX: PyYAML is imported on the first load rather than with this module,
+# so importing the parser (e.g. for ClothoValidationError) stays cheap
+_SafeLoader = None
+
+
+def _safe_loader():
+    """Return the YAML safe loader class, importing PyYAML on first use."""
+    global _SafeLoader
+    if _SafeLoader is None:
+        # PERFORMANCE FIX: Use libyaml's C parser when PyYAML was built with it (same safe
+        # semantics, many times faster on large blueprints); fall back to the pure-Python one
+        try:
+            from yaml import CSafeLoader as _SafeLoader
+        except ImportError:
+            from yaml import SafeLoader as _SafeLoader
+    return _SafeLoader
+
+# PERFORMANCE FIX: Validated blueprints per absolute path, tagged with the file's
+# (mtime_ns, size) so reloading an unchanged file skips the YAML parse and validation
+_blueprint_cache = {}
+
+_REQUIRED_SECTIONS = ('design', 'types', 'test', 'run')
+_REQUIRED_SECTION_SET = frozenset(_REQUIRED_SECTIONS)
+
+# (section, nested key or None, expected type, message), checked in order. A nested
+# key must be present in its (already type-checked) section before its type is checked.
+_TYPE_CHECKS = (
+    ('design', None, dict, "The 'design' section must be a dictionary."),
+    ('design', 'components', list, "The 'design.components' must be a list."),
+    ('types', None, dict, "The 'types' section must be a dictionary."),
+    ('test', None, dict, "The 'test' section must be a dictionary."),
+    ('run', None, dict, "The 'run' section must be a dictionary."),
+)
 
 class ClothoValidationError(Exception):
     """Custom exception for errors during Clotho file validation."""
@@ -17,33 +52,27 @@ def _validate_clotho_structure(data):
     Raises ClothoValidationError with a specific message if any check fails.
     """
     # Enforce modern Clotho structure
-    required_sections = ['design', 'types', 'test', 'run']
-    missing_sections = [section for section in required_sections if section not in data]
+    # PERFORMANCE FIX: One set difference against the dict keys instead of a membership
+    # test per section; the list is only rebuilt (in declared order) for the error
+    missing = _REQUIRED_SECTION_SET.difference(data) if isinstance(data, dict) else _REQUIRED_SECTION_SET
     
-    if missing_sections:
+    if missing:
+        missing_sections = [section for section in _REQUIRED_SECTIONS if section in missing]
         raise ClothoValidationError(f"Clotho file is missing required section(s): {', '.join(missing_sections)}")
     
-    # Validate Design section
-    design = data['design']
-    if not isinstance(design, dict):
-        raise ClothoValidationError("The 'design' section must be a dictionary.")
-    if 'components' not in design:
-        raise ClothoValidationError("The 'design' section is missing the required 'components' key.")
-    if not isinstance(design['components'], list):
-        raise ClothoValidationError("The 'design.components' must be a list.")
-    
-    # Validate Types section
-    if not isinstance(data['types'], dict):
-        raise ClothoValidationError("The 'types' section must be a dictionary.")
-    
-    # Validate Test section
-    if not isinstance(data['test'], dict):
-        raise ClothoValidationError("The 'test' section must be a dictionary.")
+    # PERFORMANCE FIX: Walk the module-level type table instead of a chain of
+    # hand-written isinstance branches
+    for section, key, expected_type, message in _TYPE_CHECKS:
+        value = data[section]
+        if key is not None:
+            if key not in value:
+                raise ClothoValidationError(f"The '{section}' section is missing the required '{key}' key.")
+            value = value[key]
+        if not isinstance(value, expected_type):
+            raise ClothoValidationError(message)
     
     # Validate Run section
     run = data['run']
-    if not isinstance(run, dict):
-        raise ClothoValidationError("The 'run' section must be a dictionary.")
     if 'generators' not in run and 'scenarios' not in run:
         raise ClothoValidationError("The 'run' section must contain either 'generators' or 'scenarios'.")
 
@@ -60,16 +89,28 @@ def load_clotho_from_file(file_path):
     """
     if not file_path:
         return None
-        
+
+    import yaml
+
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = yaml.safe_load(f)
+        # PERFORMANCE FIX: Read the bytes in one call and decode them once; the file is
+        # always UTF-8, so the parser's BOM-based encoding detection never applies
+        with open(file_path, 'rb') as f:
+            st = os.fstat(f.fileno())
+            abs_path = os.path.abspath(file_path)
+            stamp = (st.st_mtime_ns, st.st_size)
+            cached = _blueprint_cache.get(abs_path)
+            if cached is not None and cached[0] == stamp:
+                # Callers are free to mutate what they get back, so hand out a copy
+                return copy.deepcopy(cached[1])
+            raw = f.read()
+        data = yaml.load(raw.decode('utf-8'), Loader=_safe_loader())
     except FileNotFoundError:
         raise ClothoValidationError(f"The file could not be found at path: {file_path}")
-    except yaml.YAMLError as e:
-        raise ClothoValidationError(f"Error parsing YAML file: {e}")
     except UnicodeDecodeError as e:
         raise ClothoValidationError(f"Failed to decode file using UTF-8 (Check file encoding): {e}")
+    except yaml.YAMLError as e:
+        raise ClothoValidationError(f"Error parsing YAML file: {e}")
 
     # Check for None in case the YAML file is empty or just contains comments
     if data is None:
@@ -77,5 +118,6 @@ def load_clotho_from_file(file_path):
 
     # Validate Clotho structure
     _validate_clotho_structure(data)
-    
+
+    _blueprint_cache[abs_path] = (stamp, copy.deepcopy(data))
     return data 
@@ -1,11 +1,14 @@
 # core/clotho_simulator.py
 import sqlite3
+import sys
 import uuid
 import os
 import re
-import yaml
 import json
 import importlib
+import functools
+import itertools
+import operator
 import random
 import logging
 from datetime import datetime, timezone
@@ -17,6 +20,112 @@ from .static_analyzer import ClothoStaticAnalyzer # Import Static Analyzer
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# PERFORMANCE FIX: Template patterns compiled once instead of looked up in re's cache
+# on every string _resolve_expressions visits
+_FULL_EXPR_RE = re.compile(r"^\s*\{\{\s*(.+?)\s*\}\}\s*$")
+_EMBED_EXPR_RE = re.compile(r'\{\{\s*(.+?)\s*\}\}')
+
+_SIMPLE_CONDITION_RE = re.compile(r"^\s*([^><=!]+)\s*$")
+_OP_CONDITION_RE = re.compile(r"([><=!]+)\s*(.+)")
+_CONDITION_OPS = {
+    '>': operator.gt, '<': operator.lt, '>=': operator.ge,
+    '<=': operator.le, '==': operator.eq, '!=': operator.ne,
+}
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_condition(condition_str):
+    """
+    Parse a stripped match condition such as '>= 2000', 'Active' or '== null'.
+
+    Returns:
+        (kind, op, comparison string, is null literal, comparison as float or None),
+        where kind is 'simple' (bare value), 'op' (operator + value) or None
+    """
+    simple = _SIMPLE_CONDITION_RE.match(condition_str)
+    if simple:
+        kind, op, comp_val_str = 'simple', None, simple.group(1).strip()
+    else:
+        op_match = _OP_CONDITION_RE.match(condition_str)
+        if not op_match:
+            return None, None, condition_str, False, None
+        kind, op, comp_val_str = 'op', op_match.group(1), op_match.group(2).strip()
+    try:
+        comp_num = float(comp_val_str)
+    except ValueError:
+        comp_num = None
+    return kind, op, comp_val_str, comp_val_str.lower() in ('null', 'none'), comp_num
+
+
+# Scalar types that never carry a template
+_LITERAL_TYPES = frozenset((int, float, bool, type(None)))
+
+
+def _resolve_embedded(text, interpreter):
+    """Substitute every {{...}} in text, leaving expressions that evaluate to None as-is."""
+    def replace_expr(match_obj):
+        expr = match_obj.group(1).strip()
+        result = evaluate(expr, interpreter)
+        return str(result) if result is not None else match_obj.group(0)
+
+    return _EMBED_EXPR_RE.sub(replace_expr, text)
+
+
+def _resolve_leaf(value, interpreter):
+    """Resolve a non-container value: a whole-string {{expr}} evaluates to its result."""
+    if not isinstance(value, str) or '{{' not in value:
+        return value
+    match = _FULL_EXPR_RE.match(value)
+    if match:
+        return evaluate(match.group(1).strip(), interpreter)
+    # This handles cases like ">= {{trigger.payload.amount}}"
+    return _resolve_embedded(value, interpreter)
+
+
+def _compile_template(data):
+    """
+    Compile a handler data structure (payload, where, set, ...) into a resolver.
+
+    PERFORMANCE FIX: The {{...}} templates in handler logic are static, so they are
+    located and split once here instead of on every execution. The returned function
+    takes an ExpressionInterpreter and produces the same result as
+    Simulator._resolve_expressions, with freshly built containers on every call.
+    """
+    if isinstance(data, dict):
+        items = [(k, _compile_template(v)) for k, v in data.items()]
+        return lambda interpreter: {k: resolve(interpreter) for k, resolve in items}
+    if isinstance(data, list):
+        resolvers = [_compile_template(item) for item in data]
+        return lambda interpreter: [resolve(interpreter) for resolve in resolvers]
+    if isinstance(data, str) and '{{' in data:
+        match = _FULL_EXPR_RE.match(data)
+        if match:
+            expr = match.group(1).strip()
+            return lambda interpreter: evaluate(expr, interpreter)
+
+        return lambda interpreter: _resolve_embedded(data, interpreter)
+    return lambda interpreter: data
+
+
+# PERFORMANCE FIX: Every event_log row goes through this one statement text, so
+# sqlite3's per-connection statement cache prepares it once per run
+_EVENT_LOG_INSERT = (
+    "INSERT INTO event_log (event_id, timestamp, correlation_id, causation_id, component, "
+    "handler_name, trigger_message, table_name, action, payload, simulation_seed) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+# PERFORMANCE FIX: Pragmas for file-backed run databases. WAL + synchronous=NORMAL make
+# each per-event commit an append without fsync; the rest keep temp tables, pages and
+# reads in memory. Override or extend per run with config['db_pragmas'].
+_DEFAULT_DB_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'temp_store': 'MEMORY',
+    'cache_size': -65536,       # 64 MB page cache
+    'mmap_size': 268435456,     # 256 MB memory-mapped I/O
+}
+
 # --- Proxy Classes for Lazy Loading in Expressions ---
 class ComponentProxy:
     def __init__(self, simulator, component_name):
@@ -54,6 +163,12 @@ class Simulator:
         # Configuration
         self.max_events = self.config.get('max_events', 100000) # Default increased to 100k
         self.db_mode = self.config.get('db_mode', 'file') # 'file' or 'memory'
+        self.db_pragmas = {**_DEFAULT_DB_PRAGMAS, **self.config.get('db_pragmas', {})}
+        # PERFORMANCE FIX: Finished handlers are committed in groups rather than one
+        # transaction each (invariant checks read uncommitted writes on the same connection)
+        self.commit_batch_size = max(1, self.config.get('commit_batch_size', 64))
+        self._uncommitted_handlers = 0
+        self._compiled_steps = {}  # id(step) -> (step, compiled closure)
         
         # M3: Randomized scheduling with seed-based replay
         # CRITICAL FIX: Use private Random instance to avoid thread pollution
@@ -87,6 +202,7 @@ class Simulator:
         # --- Clotho Structure Support ---
         if 'design' in self.clotho_data and 'components' in self.clotho_data['design']:
             self.clotho_data['components'] = self.clotho_data['design']['components']
+        self._build_component_indexes()
         
         # Handle scenarios in 'run' section (Clotho v3)
         if 'scenarios' not in self.clotho_data and 'run' in self.clotho_data:
@@ -122,7 +238,9 @@ class Simulator:
         self.logger.info(f"Loading Python handler for '{component_name}' from module '{module_name}'")
         try:
             # Dynamically import the module
-            handler_module = importlib.import_module(module_name)
+            # PERFORMANCE FIX: Reuse an already-imported module straight from sys.modules;
+            # sweeps build one Simulator per seed against the same handler module
+            handler_module = sys.modules.get(module_name) or importlib.import_module(module_name)
             # The class name is defined by our prompt
             HandlerClass = getattr(handler_module, f"{component_name}Handler")
 
@@ -140,9 +258,15 @@ class Simulator:
             except PermissionError:
                 self.logger.warning(f"Could not remove existing DB file {self.db_path}, it might be in use.")
                 
-        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        # Room in the prepared-statement cache for the per-table read/write statements of
+        # larger designs on top of the event_log insert
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False, cached_statements=256)
         self.conn.row_factory = sqlite3.Row
         self.cursor = self.conn.cursor()
+        if self.db_mode != 'memory':
+            # _close_db switches a WAL database back to a rollback journal
+            for name, value in self.db_pragmas.items():
+                self.cursor.execute(f"PRAGMA {name}={value}")
 
     def _close_db(self):
         """CRITICAL FIX: Robust DB closing to prevent file handle leaks"""
@@ -151,6 +275,13 @@ class Simulator:
                 self.conn.commit()
             except Exception:
                 pass  # Ignore commit errors on close
+            if self.db_mode != 'memory':
+                try:
+                    # Checkpoint the WAL into the file so read-only openers (chaos matrix,
+                    # trace analyzer) don't leave -wal/-shm files next to every run
+                    self.conn.execute("PRAGMA journal_mode=DELETE")
+                except Exception:
+                    pass  # Still readable in WAL mode
             try:
                 self.conn.close()
                 self.conn = None
@@ -176,6 +307,8 @@ class Simulator:
                 simulation_seed INTEGER
             )
         """)
+        # Row-history lookups in TraceAnalyzer filter by table and order by time
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_event_log_table_ts ON event_log(table_name, timestamp)")
         
         # M3: Create simulation_metadata table to store seed and run info
         self.cursor.execute("""
@@ -238,24 +371,44 @@ class Simulator:
         self.conn.commit()
 
     def _initialize_database_state(self):
-        for state in self.current_scenario.get('initial_state', []):
-            comp_name = state['component']
-            # Support both 'state' and 'storage' keys for backwards compatibility
-            storage_data = state.get('storage', state.get('state', {}))
-            for table, records in storage_data.items():
-                full_table_name = f"{comp_name}_{table}"
+        # PERFORMANCE FIX: Insert each run of records with the same table and column set
+        # with one executemany, building its INSERT statement once (seed order is kept)
+        def seed_records():
+            for state in self.current_scenario.get('initial_state', []):
+                comp_name = state['component']
+                # Support both 'state' and 'storage' keys for backwards compatibility
+                storage_data = state.get('storage', state.get('state', {}))
+                for table, records in storage_data.items():
+                    full_table_name = f"{comp_name}_{table}"
+                    for record in records:
+                        yield (full_table_name, tuple(record)), record
+
+        for (full_table_name, columns), group in itertools.groupby(seed_records(), key=lambda item: item[0]):
+            records = [record for _, record in group]
+            cols = ', '.join(columns)
+            placeholders = ', '.join(['?'] * len(columns))
+            sql = f"INSERT INTO {full_table_name} ({cols}) VALUES ({placeholders})"
+            self.cursor.execute("SAVEPOINT seed_group")
+            try:
+                self.cursor.executemany(sql, [tuple(record.values()) for record in records])
+            except sqlite3.Error:
+                # Undo the partial group and insert row by row so each bad record is
+                # reported on its own and the good ones still land
+                self.cursor.execute("ROLLBACK TO seed_group")
                 for record in records:
-                    cols = ', '.join(record.keys())
-                    placeholders = ', '.join(['?'] * len(record))
-                    sql = f"INSERT INTO {full_table_name} ({cols}) VALUES ({placeholders})"
                     try:
                         self.cursor.execute(sql, tuple(record.values()))
                     except sqlite3.Error as e:
                          self.logger.error(f"Failed to insert initial state into {full_table_name}: {e}\nRecord: {record}")
+            self.cursor.execute("RELEASE seed_group")
         self.conn.commit()
 
     # --- MODIFIED: Call evaluate without parser argument ---
     def _resolve_expressions(self, data_struct, context_or_interpreter):
+        # Most strings are plain literals with no template to resolve
+        if isinstance(data_struct, str) and '{{' not in data_struct:
+            return data_struct
+        
         interpreter = None
         if isinstance(context_or_interpreter, ExpressionInterpreter):
              interpreter = context_or_interpreter
@@ -265,80 +418,67 @@ class Simulator:
              self.logger.error(f"Invalid context type for resolution: {type(context_or_interpreter)}")
              return data_struct
 
-        if isinstance(data_struct, dict):
-            return {k: self._resolve_expressions(v, interpreter) for k, v in data_struct.items()}
-        elif isinstance(data_struct, list):
-            return [self._resolve_expressions(item, interpreter) for item in data_struct]
-        elif isinstance(data_struct, str):
-            # First try complete {{...}} match
-            match = re.match(r"^\s*\{\{\s*(.+?)\s*\}\}\s*$", data_struct)
-            if match:
-                 expr = match.group(1).strip()
-                 # --- Call imported evaluate (no parser needed) ---
-                 return evaluate(expr, interpreter)
-            
-            # If no complete match, try to resolve embedded {{...}} expressions
-            # This handles cases like ">= {{trigger.payload.amount}}"
-            def replace_expr(match_obj):
-                expr = match_obj.group(1).strip()
-                result = evaluate(expr, interpreter)
-                return str(result) if result is not None else match_obj.group(0)
-            
-            # Replace all {{...}} patterns in the string
-            resolved = re.sub(r'\{\{\s*(.+?)\s*\}\}', replace_expr, data_struct)
-            return resolved
-        return data_struct
+        if not isinstance(data_struct, (dict, list)):
+            return _resolve_leaf(data_struct, interpreter)
+
+        # PERFORMANCE FIX: Walk nested dicts/lists with an explicit stack instead of one
+        # recursive call per node, so deep payloads cannot hit the recursion limit and
+        # literal leaves cost a type check rather than a call frame. Containers are
+        # still rebuilt, so callers can mutate the result freely.
+        root = [None]
+        stack = [(data_struct, root, 0)]
+        while stack:
+            source, parent, slot = stack.pop()
+            if isinstance(source, dict):
+                resolved = dict.fromkeys(source)
+                items = source.items()
+            else:
+                resolved = [None] * len(source)
+                items = enumerate(source)
+            parent[slot] = resolved
+            for key, value in items:
+                if type(value) in _LITERAL_TYPES:
+                    resolved[key] = value
+                elif isinstance(value, (dict, list)):
+                    stack.append((value, resolved, key))
+                else:
+                    resolved[key] = _resolve_leaf(value, interpreter)
+        return root[0]
 
     def _evaluate_condition(self, value, condition_str):
         self.logger.debug(f"Evaluating condition: value='{value}' (type: {type(value)}), condition='{condition_str}'")
+        condition_str = str(condition_str).strip()
+        # PERFORMANCE FIX: Regex matching and float parsing of the condition are cached
+        kind, op, comp_val_str, comp_is_null, comp_num = _parse_condition(condition_str)
+
         if value is None:
-             op_match = re.match(r"([><=!]+)\s*(.+)", condition_str.strip())
-             if op_match:
-                 op = op_match.group(1)
-                 comp_val_str = op_match.group(2).strip()
-                 if op == '==' and comp_val_str.lower() in ('null', 'none'): return True
-                 if op == '!=' and comp_val_str.lower() not in ('null', 'none'): return True
+             if kind == 'op':
+                 if op == '==' and comp_is_null: return True
+                 if op == '!=' and not comp_is_null: return True
              return False
 
-        condition_str = str(condition_str).strip()
-        simple_equality_match = re.match(r"^\s*([^><=!]+)\s*$", condition_str)
-        if simple_equality_match:
-            comp_val_str = simple_equality_match.group(1).strip()
-            try:
-                if isinstance(value, (int, float)):
-                    comp_val = float(comp_val_str)
-                    return value == comp_val
-                elif isinstance(value, bool):
-                     return value == (comp_val_str.lower() == 'true')
-            except ValueError:
-                 pass
+        if kind == 'simple':
+            if isinstance(value, (int, float)) and comp_num is not None:
+                return value == comp_num
             return str(value) == comp_val_str
 
-        op_match = re.match(r"([><=!]+)\s*(.+)", condition_str)
-        if not op_match:
+        if kind != 'op':
              self.logger.warning(f"Could not parse condition: '{condition_str}'. Treating as string equality.")
              return str(value) == condition_str
 
         try:
-            op, comp_val_str = op_match.groups()
-            comp_val_str = comp_val_str.strip()
-
-            if comp_val_str.lower() in ('null', 'none'):
-                if op == '==': return value is None
-                if op == '!=': return value is not None
-                return False
+            if comp_is_null:
+                return op == '!='
 
             try:
-                num_to_compare = float(comp_val_str)
+                if comp_num is None:
+                    raise ValueError(comp_val_str)
                 value_as_float = float(value)
-                if op == '>':   return value_as_float > num_to_compare
-                if op == '<':   return value_as_float < num_to_compare
-                if op == '>=':  return value_as_float >= num_to_compare
-                if op == '<=':  return value_as_float <= num_to_compare
-                if op == '==':  return value_as_float == num_to_compare
-                if op == '!=':  return value_as_float != num_to_compare
-                self.logger.warning(f"Unknown numeric operator '{op}' in condition.")
-                return False
+                compare = _CONDITION_OPS.get(op)
+                if compare is None:
+                    self.logger.warning(f"Unknown numeric operator '{op}' in condition.")
+                    return False
+                return compare(value_as_float, comp_num)
             except (ValueError, TypeError):
                  if op == '==': return str(value) == comp_val_str
                  if op == '!=': return str(value) != comp_val_str
@@ -415,78 +555,123 @@ class Simulator:
     def _execute_steps(self, steps, context, correlation_id, component_name):
         interpreter = ExpressionInterpreter(context)
         for step in steps:
-            if 'read' in step:
-                table = step['read']
-                key = step.get('key')
-                where = step.get('where', {})
-                if key:
-                    where['id'] = key
-                
-                as_var = step.get('as')
-                where = self._resolve_expressions(where, interpreter)
-                
-                read_result = self.read(table=table, where_clause=where, owner_component=component_name)
+            nested_steps = self._compiled_step(step)(context, interpreter, correlation_id, component_name)
+            if nested_steps:
+                # Execute nested steps of the matched case
+                self._execute_steps(nested_steps, context, correlation_id, component_name)
+
+    def _compiled_step(self, step):
+        """Return the compiled form of a handler logic step, compiling it on first use."""
+        entry = self._compiled_steps.get(id(step))
+        if entry is None or entry[0] is not step:
+            # Keep the step alive alongside its closure so its id() cannot be reused
+            entry = (step, self._compile_step(step))
+            self._compiled_steps[id(step)] = entry
+        return entry[1]
+
+    def _compile_step(self, step):
+        """
+        PERFORMANCE FIX: Specialize one handler logic step into a closure.
+
+        The step kind, table names and compiled templates are fixed when the closure is
+        built, so executing it only evaluates expressions and performs the operation.
+        The closure takes (context, interpreter, correlation_id, component_name) and
+        returns the steps of the matched case for 'match', otherwise an empty list.
+        """
+        if 'read' in step:
+            table = step['read']
+            key = step.get('key')
+            where = step.get('where', {})
+            if key:
+                where = {**where, 'id': key}
+            as_var = step.get('as')
+            resolve_where = _compile_template(where)
+
+            def run(context, interpreter, correlation_id, component_name):
+                read_result = self.read(table=table, where_clause=resolve_where(interpreter), owner_component=component_name)
                 context['read'][as_var] = read_result
-            
-            elif 'create' in step:
-                table = step['create']
-                data = step.get('data', {})
-                data = self._resolve_expressions(data, interpreter)
-                self.write(table=table, action='CREATE', data=data, correlation_id=correlation_id, owner_component=component_name)
-
-            elif 'update' in step:
-                table = step['update']
-                where = step.get('where', {})
-                set_data = step.get('set', {})
-                
-                where = self._resolve_expressions(where, interpreter)
-                set_data = self._resolve_expressions(set_data, interpreter)
-                
+                return []
+
+        elif 'create' in step:
+            table = step['create']
+            resolve_data = _compile_template(step.get('data', {}))
+
+            def run(context, interpreter, correlation_id, component_name):
+                self.write(table=table, action='CREATE', data=resolve_data(interpreter), correlation_id=correlation_id, owner_component=component_name)
+                return []
+
+        elif 'update' in step:
+            table = step['update']
+            resolve_where = _compile_template(step.get('where', {}))
+            resolve_set = _compile_template(step.get('set', {}))
+
+            def run(context, interpreter, correlation_id, component_name):
+                where = resolve_where(interpreter)
+                set_data = resolve_set(interpreter)
                 self.write(table=table, action='UPDATE', data=set_data, where_clause=where, correlation_id=correlation_id, owner_component=component_name)
-            
-            elif 'send' in step:
-                to = step['send'].get('to')
-                message = step['send'].get('message')
-                payload = step['send'].get('payload', {})
-                payload = self._resolve_expressions(payload, interpreter)
-                self.send_message(to=to, message=message, payload=payload, correlation_id=correlation_id, owner_component=component_name)
-
-            elif 'match' in step:
-                match_block = step['match']
-                on_expression = match_block.get('on')
-                match_value = self._resolve_expressions(on_expression, interpreter)
-                
-                executed_case = False
-                for case in match_block.get('cases', []):
-                    condition = case.get('when')
-                    is_default = 'default' in case
-                    case_matched = False
-                    
-                    if condition is not None:
-                        resolved_condition = self._resolve_expressions(condition, interpreter)
-                        if self._evaluate_condition(match_value, resolved_condition):
-                            case_matched = True
-                    elif is_default and not executed_case:
-                        case_matched = True
-                        
-                    if case_matched:
-                        # Execute nested steps
-                        self._execute_steps(case.get('then', []), context, correlation_id, component_name)
-                        executed_case = True
-                        break
+                return []
+
+        elif 'send' in step:
+            to = step['send'].get('to')
+            message = step['send'].get('message')
+            resolve_payload = _compile_template(step['send'].get('payload', {}))
+
+            def run(context, interpreter, correlation_id, component_name):
+                self.send_message(to=to, message=message, payload=resolve_payload(interpreter), correlation_id=correlation_id, owner_component=component_name)
+                return []
+
+        elif 'match' in step:
+            match_block = step['match']
+            resolve_on = _compile_template(match_block.get('on'))
+            cases = [
+                (_compile_template(case['when']) if case.get('when') is not None else None,
+                 'default' in case, case.get('then', []))
+                for case in match_block.get('cases', [])
+            ]
+
+            def run(context, interpreter, correlation_id, component_name):
+                match_value = resolve_on(interpreter)
+                for resolve_condition, is_default, then_steps in cases:
+                    if resolve_condition is not None:
+                        if self._evaluate_condition(match_value, resolve_condition(interpreter)):
+                            return then_steps
+                    elif is_default:
+                        return then_steps
+                return []
+
+        else:
+            def run(context, interpreter, correlation_id, component_name):
+                return []
+
+        return run
+
+    def _build_component_indexes(self):
+        """
+        PERFORMANCE FIX: Index table owners and handlers once, so the lookups done on
+        every read, write and scenario step are dict hits instead of component scans.
+        The first match wins, as with the linear scans these replace. Indexed handlers
+        are copies tagged with their 'component_name', so the spec itself is never written.
+        """
+        self._table_owners = {}
+        self._handler_index = {}
+        for comp in self.clotho_data.get('components', []):
+            if not comp:
+                continue
+            # Clotho Standard: 'state' is a list of dicts
+            for state_item in comp.get('state', []):
+                self._table_owners.setdefault(state_item.get('name'), comp['name'])
+            for h in comp.get('handlers', []):
+                if h:
+                    key = (comp.get('name'), h.get('on_message'))
+                    if key not in self._handler_index:
+                        self._handler_index[key] = dict(h, component_name=comp.get('name'))
 
     def _find_owner_component(self, table_name):
         """
         Helper to find which component owns a given table.
         Uses Clotho v1.0 'state' structure (list of dicts).
         """
-        for comp in self.clotho_data.get('components', []):
-            # Clotho Standard: Check 'state' list
-            if 'state' in comp:
-                for state_item in comp['state']:
-                    if state_item.get('name') == table_name:
-                        return comp['name']
-        return None
+        return self._table_owners.get(table_name)
 
     def select_scenario(self, scenario_name):
         found = False
@@ -508,11 +693,16 @@ class Simulator:
             return False
 
         # M3: Randomized scheduling - pick random event from queue
-        if len(self.event_queue) > 1:
-            index = self.rng.randint(0, len(self.event_queue) - 1)  # Use private RNG
-            item = self.event_queue.pop(index)
+        # PERFORMANCE FIX: Swap the pick with the last entry and pop the tail, O(1) instead
+        # of shifting everything after it; the pick stays uniform over the queue
+        queue = self.event_queue
+        if len(queue) > 1:
+            index = self.rng.randint(0, len(queue) - 1)  # Use private RNG
+            item = queue[index]
+            queue[index] = queue[-1]
+            queue.pop()
         else:
-            item = self.event_queue.pop(0)
+            item = queue.pop()
         
         self.processed_event_count += 1
         
@@ -533,7 +723,6 @@ class Simulator:
             
             handler = self._find_handler(to_component, message)
             if handler:
-                handler['component_name'] = to_component
                 trigger = {
                         'sender': sender,
                         'message': message,
@@ -547,12 +736,7 @@ class Simulator:
                 
                 # Log HANDLER_EXEC to DB
                 ts = datetime.now(timezone.utc).isoformat()
-                self.cursor.execute("""
-                    INSERT INTO event_log 
-                    (event_id, timestamp, correlation_id, causation_id, component, handler_name, 
-                        trigger_message, table_name, action, payload, simulation_seed) 
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (event_id, ts, cid, causation_id, handler['component_name'], 
+                self.cursor.execute(_EVENT_LOG_INSERT, (event_id, ts, cid, causation_id, handler['component_name'], 
                         message, message, f"{handler['component_name']}_handler", 'HANDLER_EXEC', 
                         json.dumps(trigger.get('payload', {})), self.simulation_seed))
                 
@@ -587,7 +771,10 @@ class Simulator:
                 self._current_event_id = item.get('causation_id') # Use causation ID as parent for invariant events? Or generate new?
                 
                 try:
-                    self.conn.commit()
+                    self._uncommitted_handlers += 1
+                    if self._uncommitted_handlers >= self.commit_batch_size or not self.event_queue:
+                        self.conn.commit()
+                        self._uncommitted_handlers = 0
                     self._check_invariants()
                 except RuntimeError as e:
                     # Re-raise invariant failures (which are RuntimeErrors in strict mode)
@@ -631,6 +818,7 @@ class Simulator:
             raw_steps = self.current_scenario.get('steps', [])
 
             self.event_queue = []
+            self._uncommitted_handlers = 0
             for step in raw_steps:
                 if step and 'send' in step:
                     self.event_queue.append(
@@ -707,12 +895,7 @@ class Simulator:
                         cid = self._current_cid if hasattr(self, '_current_cid') else 'SYSTEM'
                         causation = self._current_event_id if hasattr(self, '_current_event_id') else 'SYSTEM'
                         
-                        self.cursor.execute("""
-                            INSERT INTO event_log 
-                            (event_id, timestamp, correlation_id, causation_id, component, handler_name, 
-                             trigger_message, table_name, action, payload, simulation_seed) 
-                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                        """, (fail_id, ts, cid, causation, comp.get('name', 'unknown'), 
+                        self.cursor.execute(_EVENT_LOG_INSERT, (fail_id, ts, cid, causation, comp.get('name', 'unknown'), 
                               'INVARIANT_CHECK', 'INVARIANT_FAILURE', 'SYSTEM', 'INVARIANT_FAIL', 
                               json.dumps({'error': msg, 'invariant': inv_expr}), self.simulation_seed))
                         self.conn.commit()
@@ -744,12 +927,7 @@ class Simulator:
         
         # Log handler execution (even if it has no writes)
         # This ensures all events are tracked in the DAG
-        self.cursor.execute("""
-            INSERT INTO event_log 
-            (event_id, timestamp, correlation_id, causation_id, component, handler_name, 
-             trigger_message, table_name, action, payload, simulation_seed) 
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (event_id, ts, correlation_id, causation_id, component_name, 
+        self.cursor.execute(_EVENT_LOG_INSERT, (event_id, ts, correlation_id, causation_id, component_name, 
               handler_name, trigger_msg_name, f"{component_name}_handler", 'HANDLER_EXEC', 
               json.dumps(trigger_message.get('payload', {})), self.simulation_seed))
         
@@ -832,12 +1010,7 @@ class Simulator:
                 params = tuple(json.dumps(v) if isinstance(v, (dict, list)) else v for v in data_to_insert.values())
                 self.cursor.execute(sql, params)
                 log_payload = data_to_insert
-                self.cursor.execute("""
-                    INSERT INTO event_log 
-                    (event_id, timestamp, correlation_id, causation_id, component, handler_name, 
-                     trigger_message, table_name, action, payload, simulation_seed) 
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (event_id, ts, correlation_id, causation_id, table_owner, 
+                self.cursor.execute(_EVENT_LOG_INSERT, (event_id, ts, correlation_id, causation_id, table_owner, 
                       owner_component, None, full_table_name, 'CREATE', json.dumps(log_payload), self.simulation_seed))
             elif action_upper == 'UPDATE':
                 if not data or not where_clause:
@@ -859,12 +1032,7 @@ class Simulator:
                 params = tuple(json.dumps(v) if isinstance(v, (dict, list)) else v for v in set_data.values()) + tuple(where_data.values())
                 self.cursor.execute(sql, params)
                 log_payload = {'update': set_data, 'where': where_data}
-                self.cursor.execute("""
-                    INSERT INTO event_log 
-                    (event_id, timestamp, correlation_id, causation_id, component, handler_name, 
-                     trigger_message, table_name, action, payload, simulation_seed) 
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (event_id, ts, correlation_id, causation_id, table_owner, 
+                self.cursor.execute(_EVENT_LOG_INSERT, (event_id, ts, correlation_id, causation_id, table_owner, 
                       owner_component, None, full_table_name, 'UPDATE', json.dumps(log_payload), self.simulation_seed))
             elif action_upper == 'DELETE':
                  if not where_clause:
@@ -879,12 +1047,7 @@ class Simulator:
                  params = tuple(where_clause.values())
                  self.cursor.execute(sql, params)
                  log_payload = {'where': where_clause}
-                 self.cursor.execute("""
-                    INSERT INTO event_log 
-                    (event_id, timestamp, correlation_id, causation_id, component, handler_name, 
-                     trigger_message, table_name, action, payload, simulation_seed) 
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (event_id, ts, correlation_id, causation_id, table_owner, 
+                 self.cursor.execute(_EVENT_LOG_INSERT, (event_id, ts, correlation_id, causation_id, table_owner, 
                       owner_component, None, full_table_name, 'DELETE', json.dumps(log_payload), self.simulation_seed))
             else:
                 self.logger.error(f"Unsupported write action: {action}")
@@ -927,12 +1090,7 @@ class Simulator:
                         # Log fault injection
                         ts = datetime.now(timezone.utc).isoformat()
                         event_id = self._generate_deterministic_id("fault", 12)
-                        self.cursor.execute("""
-                            INSERT INTO event_log 
-                            (event_id, timestamp, correlation_id, causation_id, component, handler_name, 
-                             trigger_message, table_name, action, payload, simulation_seed) 
-                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                        """, (event_id, ts, correlation_id, parent_event_id, owner_component, 
+                        self.cursor.execute(_EVENT_LOG_INSERT, (event_id, ts, correlation_id, parent_event_id, owner_component, 
                               None, message, 'FAULT', 'FAULT_INJECTION', 
                               json.dumps({'fault_type': 'MessageDrop', 'target': to}), self.simulation_seed))
                         return # Drop the message (don't add to queue)
@@ -954,12 +1112,7 @@ class Simulator:
         self.logger.debug(f"Queued message: '{message}' from '{owner_component}' to '{to}' [CID: {correlation_id}] [Parent: {self._current_event_id}]")
 
     def _find_handler(self, component_name, message_name):
-        for comp in self.clotho_data.get('components', []):
-            if comp and comp.get('name') == component_name:
-                for h in comp.get('handlers', []):
-                     if h and h.get('on_message') == message_name:
-                          return h
-        return None
+        return self._handler_index.get((component_name, message_name))
     
     def get_all_states(self) -> dict:
         """
@@ -1122,69 +1275,7 @@ class Simulator:
 
     def _execute_single_step(self, step, context, correlation_id, component_name):
         interpreter = ExpressionInterpreter(context)
-        new_steps = []
-        
-        if 'read' in step:
-            table = step['read']
-            key = step.get('key')
-            where = step.get('where', {})
-            if key:
-                where['id'] = key
-            
-            as_var = step.get('as')
-            where = self._resolve_expressions(where, interpreter)
-            
-            read_result = self.read(table=table, where_clause=where, owner_component=component_name)
-            context['read'][as_var] = read_result
-        
-        elif 'create' in step:
-            table = step['create']
-            data = step.get('data', {})
-            data = self._resolve_expressions(data, interpreter)
-            self.write(table=table, action='CREATE', data=data, correlation_id=correlation_id, owner_component=component_name)
-
-        elif 'update' in step:
-            table = step['update']
-            where = step.get('where', {})
-            set_data = step.get('set', {})
-            
-            where = self._resolve_expressions(where, interpreter)
-            set_data = self._resolve_expressions(set_data, interpreter)
-            
-            self.write(table=table, action='UPDATE', data=set_data, where_clause=where, correlation_id=correlation_id, owner_component=component_name)
-        
-        elif 'send' in step:
-            to = step['send'].get('to')
-            message = step['send'].get('message')
-            payload = step['send'].get('payload', {})
-            payload = self._resolve_expressions(payload, interpreter)
-            self.send_message(to=to, message=message, payload=payload, correlation_id=correlation_id, owner_component=component_name)
-
-        elif 'match' in step:
-            match_block = step['match']
-            on_expression = match_block.get('on')
-            match_value = self._resolve_expressions(on_expression, interpreter)
-            
-            executed_case = False
-            for case in match_block.get('cases', []):
-                condition = case.get('when')
-                is_default = 'default' in case
-                case_matched = False
-                
-                if condition is not None:
-                    resolved_condition = self._resolve_expressions(condition, interpreter)
-                    if self._evaluate_condition(match_value, resolved_condition):
-                        case_matched = True
-                elif is_default and not executed_case:
-                    case_matched = True
-                    
-                if case_matched:
-                    # Return nested steps to be prepended to the task's step list
-                    new_steps = case.get('then', [])
-                    executed_case = True
-                    break
-            
-        return new_steps
+        return self._compiled_step(step)(context, interpreter, correlation_id, component_name)
 
     # --- Verification Engine (LTL) ---
     def verify_invariants(self):
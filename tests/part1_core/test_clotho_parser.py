@@ -100,6 +100,29 @@ run:
         self.assertEqual(len(data['design']['components']), 2)
         self.assertEqual(data['design']['components'][0]['name'], 'ComponentA')
     
+    def test_reload_is_cached_until_file_changes(self):
+        """Test that unchanged files are served from the cache as independent copies."""
+        yaml_content = """
+types: {}
+design:
+  components: []
+test: {}
+run:
+  scenarios: []
+"""
+        filepath = self._create_test_file('cached.yaml', yaml_content)
+        first = load_clotho_from_file(filepath)
+        first['design']['components'].append('mutated')
+
+        second = load_clotho_from_file(filepath)
+        self.assertEqual(second['design']['components'], [])
+
+        self._create_test_file('cached.yaml', yaml_content.replace('scenarios: []', 'scenarios: [s1]'))
+        st = os.stat(filepath)
+        os.utime(filepath, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        third = load_clotho_from_file(filepath)
+        self.assertEqual(third['run']['scenarios'], ['s1'])
+    
     def test_blueprint_with_unicode_characters(self):
         """Test loading blueprints with Unicode characters in content."""
         yaml_content = """
@@ -383,6 +406,37 @@ scenarios: []
         
         self.assertIn('parsing YAML', str(cm.exception))
     
+    def test_control_character_is_syntax_error(self):
+        """Test that a disallowed character in valid UTF-8 is reported as a YAML error."""
+        filepath = self._create_test_file('control_char.yaml', "clotho_version: '1.0'\nname: bell\x07\n")
+        
+        with self.assertRaises(ClothoValidationError) as cm:
+            load_clotho_from_file(filepath)
+        
+        self.assertIn('parsing YAML', str(cm.exception))
+    
+    def test_invalid_utf8_is_decode_error(self):
+        """Test that bytes that are not UTF-8 are reported as an encoding error."""
+        filepath = os.path.join(self.test_dir, 'latin1.yaml')
+        with open(filepath, 'wb') as f:
+            f.write("clotho_version: '1.0'\nname: caf\xe9\n".encode('latin-1'))
+        
+        with self.assertRaises(ClothoValidationError) as cm:
+            load_clotho_from_file(filepath)
+        
+        self.assertIn('decode file using UTF-8', str(cm.exception))
+    
+    def test_utf16_file_is_decode_error(self):
+        """Test that files are always read as UTF-8, even with a UTF-16 byte order mark."""
+        filepath = os.path.join(self.test_dir, 'utf16.yaml')
+        with open(filepath, 'wb') as f:
+            f.write("clotho_version: '1.0'\n".encode('utf-16'))
+        
+        with self.assertRaises(ClothoValidationError) as cm:
+            load_clotho_from_file(filepath)
+        
+        self.assertIn('decode file using UTF-8', str(cm.exception))
+    
     def test_invalid_indentation(self):
         """Test error on invalid YAML indentation."""
         yaml_content = """
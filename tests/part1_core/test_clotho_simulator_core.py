@@ -135,6 +135,25 @@ class TestSimulatorCoreBasics(unittest.TestCase):
         with self.assertRaises(ValueError) as cm:
             sim.select_scenario('NonExistentScenario')
         self.assertIn('not found', str(cm.exception))
+    
+    def test_initial_state_skips_bad_records(self):
+        """Test that seed records are batch-inserted in order and a bad one is skipped."""
+        self.test_blueprint['run']['scenarios'][0]['initial_state'] = [
+            {'component': 'ComponentA', 'storage': {'items': [
+                {'id': 1, 'value': 10},
+                {'id': 1, 'value': 20},  # duplicate primary key
+                {'id': 2, 'value': 30},
+                {'value': 40, 'id': 3},  # different column order starts a new batch
+            ]}}
+        ]
+        sim = Simulator(self.test_blueprint)
+        sim.select_scenario('TestScenario')
+        sim.run()
+        
+        conn = sqlite3.connect(sim.db_path)
+        rows = conn.execute("SELECT id, value FROM ComponentA_items ORDER BY rowid").fetchall()
+        conn.close()
+        self.assertEqual(rows, [(1, 10), (2, 30), (3, 40)])
 
 
 class TestSimulatorCRUDOperations(unittest.TestCase):
@@ -405,6 +424,31 @@ class TestMessagePropagation(unittest.TestCase):
         
         conn.close()
     
+    def test_batched_commits_persist_all_events(self):
+        """Test that grouping handler commits loses no events, whatever the batch size."""
+        for batch_size in (1, 1000):
+            sim = Simulator(self.test_blueprint, config={'commit_batch_size': batch_size})
+            sim.select_scenario('ChainTest')
+            sim.run()
+            
+            conn = sqlite3.connect(sim.db_path)
+            count = conn.execute("SELECT COUNT(*) FROM event_log WHERE action='HANDLER_EXEC'").fetchone()[0]
+            conn.close()
+            self.assertEqual(count, 3)
+    
+    def test_handler_steps_compiled_once(self):
+        """Test that handler logic steps are compiled once and reused across runs."""
+        sim = Simulator(self.test_blueprint)
+        sim.select_scenario('ChainTest')
+        sim.run()
+        
+        # One send step each in ServiceA and ServiceB; ServiceC has no logic
+        compiled = dict(sim._compiled_steps)
+        self.assertEqual(len(compiled), 2)
+        
+        sim.run()
+        self.assertEqual(sim._compiled_steps, compiled)
+    
     def test_event_queue_fifo_ordering(self):
         """Test that event queue processes events in FIFO order."""
         sim = Simulator(self.test_blueprint)
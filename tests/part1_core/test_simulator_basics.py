@@ -74,8 +74,59 @@ class TestSimulatorCoreBasics(unittest.TestCase):
         cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='TestComponent_users'")
         result = cursor.fetchone()
         self.assertIsNotNone(result)
+        
+        # The run writes in WAL mode but leaves a plain rollback-journal file behind
+        self.assertEqual(cursor.execute("PRAGMA journal_mode").fetchone()[0], 'delete')
+        self.assertFalse(os.path.exists(sim.db_path + '-wal'))
         conn.close()
 
+    def test_db_pragmas_configurable(self):
+        """Test that config['db_pragmas'] overrides the default connection pragmas."""
+        test_blueprint = {
+            'clotho_version': '1.0',
+            'types': {},
+            'design': {'components': []},
+            'test': {},
+            'run': {'scenarios': [{'name': 'test', 'initial_state': [], 'steps': []}]}
+        }
+        
+        sim = Simulator(test_blueprint, config={'db_pragmas': {'synchronous': 'FULL'}})
+        sim._connect_db()
+        try:
+            self.assertEqual(sim.conn.execute("PRAGMA synchronous").fetchone()[0], 2)  # FULL
+            self.assertEqual(sim.conn.execute("PRAGMA journal_mode").fetchone()[0], 'wal')
+            self.assertEqual(sim.conn.execute("PRAGMA cache_size").fetchone()[0], -65536)
+        finally:
+            sim._close_db()
+            os.remove(sim.db_path)
+
+    def test_python_handler_loaded_from_imported_module(self):
+        """Test that python mode instantiates the component handler from an imported module."""
+        import sys
+        import types
+        
+        class ShopHandler:
+            def __init__(self, state_manager, message_sender):
+                self.state_manager = state_manager
+        
+        module = types.ModuleType('generated_shop_handlers')
+        module.ShopHandler = ShopHandler
+        sys.modules[module.__name__] = module
+        try:
+            test_blueprint = {
+                'clotho_version': '1.0',
+                'types': {},
+                'design': {'components': []},
+                'test': {},
+                'run': {'scenarios': [{'name': 'test', 'initial_state': [], 'steps': []}]}
+            }
+            sim = Simulator(test_blueprint, mode='python',
+                            python_module_name=module.__name__, target_component='Shop')
+            self.assertIsInstance(sim.py_handler_instance, ShopHandler)
+            self.assertIs(sim.py_handler_instance.state_manager, sim)
+        finally:
+            del sys.modules[module.__name__]
+
     def test_scenario_selection(self):
         """Test scenario selection."""
         test_blueprint = {
@@ -237,6 +237,30 @@ class TestMatchConditionResolution(unittest.TestCase):
         
         self.assertEqual(resolved, 5500)
         self.assertIsInstance(resolved, int)
+    
+    def test_nested_structure_resolution(self):
+        """Test resolution through nested dicts/lists, including nesting deeper than the recursion limit"""
+        import sys
+        from core.engine.clotho_simulator import Simulator
+        
+        clotho_data = {'components': [], 'scenarios': []}
+        sim = Simulator(clotho_data, mode='yaml')
+        interpreter = ExpressionInterpreter(self.context)
+        
+        payload = {'amount': '{{trigger.payload.amount}}', 'tags': ['x', 1, None, {'s': '{{trigger.payload.status}}'}]}
+        resolved = sim._resolve_expressions(payload, interpreter)
+        self.assertEqual(resolved, {'amount': 2000, 'tags': ['x', 1, None, {'s': 'Active'}]})
+        self.assertIsNot(resolved['tags'], payload['tags'])
+        
+        deep = leaf = {}
+        for _ in range(sys.getrecursionlimit() + 100):
+            leaf['next'] = {}
+            leaf = leaf['next']
+        leaf['value'] = '{{trigger.payload.amount}}'
+        node = sim._resolve_expressions(deep, interpreter)
+        while 'next' in node:
+            node = node['next']
+        self.assertEqual(node, {'value': 2000})
 
 
 class TestConditionEvaluation(unittest.TestCase):
@@ -317,6 +341,15 @@ class TestConditionEvaluation(unittest.TestCase):
         
         result = self.sim._evaluate_condition('something', '!= null')
         self.assertTrue(result)
+    
+    def test_parsed_condition_is_reused(self):
+        """Test that repeated conditions skip re-parsing"""
+        from core.engine.clotho_simulator import _parse_condition
+        
+        self.assertEqual(_parse_condition('>= 2000'), ('op', '>=', '2000', False, 2000.0))
+        hits = _parse_condition.cache_info().hits
+        self.assertTrue(self.sim._evaluate_condition(2500, ' >= 2000 '))
+        self.assertEqual(_parse_condition.cache_info().hits, hits + 1)
 
 
 class TestTypeConversion(unittest.TestCase):
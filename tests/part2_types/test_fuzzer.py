@@ -12,7 +12,8 @@ from core.chaos.fuzzer import (
     FuzzingConfig,
     InputFuzzer,
     StateFuzzer,
-    ScenarioFuzzer
+    ScenarioFuzzer,
+    _bands
 )
 
 
@@ -293,6 +294,30 @@ class TestStateFuzzer:
         # All table names should be preserved
         assert set(state_data.keys()) == set(initial_state[0]["state"].keys())
 
+    def test_fuzz_does_not_mutate_input(self):
+        """Test that state and payload fuzzing leave their inputs untouched"""
+        initial_state = [{
+            "component": "DB",
+            "state": {"accounts": [{"account_id": 1, "balance": 1000.0, "owner": "alice"}]}
+        }]
+        payload = {"amount": 100, "meta": {"note": "x", "tags": ["a"]}}
+        original_state = copy.deepcopy(initial_state)
+        original_payload = copy.deepcopy(payload)
+        
+        for i in range(20):
+            config = FuzzingConfig(fuzz_inputs=True, fuzz_states=True, seed=i)
+            StateFuzzer(config).fuzz_initial_state(initial_state)
+            InputFuzzer(config).fuzz_payload(payload)
+        
+        assert initial_state == original_state
+        assert payload == original_payload
+
+    def test_single_draw_bands_match_sequential_checks(self):
+        """Test that strategy bands keep the probabilities of one draw per check"""
+        assert _bands(0.3, 0.2, 0.2) == pytest.approx((0.3, 0.3 + 0.7 * 0.2, 0.3 + 0.7 * 0.2 + 0.7 * 0.8 * 0.2))
+        assert _bands(1.0, 0.5) == (1.0, 1.0)
+        assert _bands(0.0) == (0.0,)
+
 
 class TestScenarioFuzzer:
     """Test scenario chaining strategies"""
@@ -383,6 +408,19 @@ class TestScenarioFuzzer:
         assert types[1] in ["A1", "B1"]  # First from other scenario
         assert types[0] != types[1]      # Not the same
 
+    def test_chain_interleaved_uneven_lengths(self):
+        """Test that interleaving keeps every step of unequal scenarios, None steps included"""
+        config = FuzzingConfig(fuzz_scenarios=True, seed=11)
+        fuzzer = ScenarioFuzzer(config)
+        
+        scenarios = [
+            {"name": "A", "steps": ["A1", None, "A3"]},
+            {"name": "B", "steps": ["B1"]},
+        ]
+        chained = fuzzer.chain_scenarios(scenarios, mode="interleaved")
+        
+        assert chained["steps"] == ["A1", "B1", None, "A3"]
+
     def test_chain_preserves_initial_state(self):
         """Test that chaining preserves initial_state from first scenario"""
         config = FuzzingConfig(fuzz_scenarios=True, seed=20)
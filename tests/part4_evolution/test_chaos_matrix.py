@@ -7,7 +7,11 @@ Verifies parallel simulation execution, failure detection, and statistics.
 import pytest
 import yaml
 import os
-from core.chaos.chaos_matrix import ChaosMatrix, print_chaos_matrix_report
+import copy
+import sqlite3
+from core.chaos.chaos_matrix import (ChaosMatrix, SimulationResult, _RunContext, _safe_delete, _warn_once,
+                                     print_chaos_matrix_report)
+from core.chaos.fuzzer import FuzzingConfig
 
 
 # Simple test system
@@ -238,6 +242,400 @@ def test_large_batch():
     print_chaos_matrix_report(stats)
 
 
+def test_fuzzing_leaves_spec_untouched():
+    """Test that fuzzing copies only the scenario it mutates"""
+    clotho_data = yaml.safe_load(TEST_YAML)
+    clotho_data['run']['scenarios'][0]['steps'][0]['payload'] = {'amount': 5}
+    config = FuzzingConfig(fuzz_inputs=True, fuzz_states=True, seed=1)
+    chaos = ChaosMatrix(clotho_data, 'test_scenario', max_workers=1, fuzzing_config=config)
+    
+    fuzzed = chaos._apply_fuzzing(seed=42)
+    
+    # Original spec is never mutated
+    assert clotho_data['run']['scenarios'][0]['steps'][0]['payload'] == {'amount': 5}
+    assert clotho_data['run']['scenarios'][0]['initial_state'][0]['state']['state'][0]['count'] == 0
+    assert 'scenarios' not in clotho_data
+    
+    # Untouched branches are shared, the fuzzed scenario is a copy
+    assert fuzzed['design'] is clotho_data['design']
+    assert fuzzed['test'] is clotho_data['test']
+    assert fuzzed['run']['scenarios'][0] is not clotho_data['run']['scenarios'][0]
+    
+    # A fuzzed run doesn't write into the shared design (e.g. its handler dicts) either
+    snapshot = copy.deepcopy(clotho_data)
+    result = chaos._run_single_simulation(42)
+    os.remove(result.db_path)
+    assert result.success
+    assert clotho_data == snapshot
+
+
+def test_invariants_planned_once():
+    """Test that invariants are classified when the matrix is built"""
+    clotho_data = yaml.safe_load(TEST_YAML)
+    clotho_data['test'] = {'invariants': [
+        {'name': 'Score', 'check': 'score_matches_action_count'},
+        {'name': 'Count', 'check': 'read.Counter_state.id == counter'},
+        {'name': 'Live', 'check': 'always(msg.increment -> eventually(read.Counter_state.id != missing))'},
+        {'name': 'Unknown', 'check': 'something_else'},
+    ]}
+    chaos = ChaosMatrix(clotho_data, 'test_scenario', max_workers=1)
+    
+    kinds = [(name, kind, args) for name, _, kind, args in chaos._invariants_plan]
+    assert kinds == [
+        ('Score', 'score', None),
+        ('Count', 'final_state', None),
+        ('Live', 'ltl', ('msg.increment', 'read.Counter_state.id != missing')),
+    ]
+    assert chaos._scenario['name'] == 'test_scenario'
+    assert chaos._final_state_columns == {'Counter_state': {'id'}}
+    
+    results, stats = chaos.run_batch(num_simulations=3, seed_start=8000)
+    assert stats.failed == 0
+
+
+def test_final_fingerprint_is_reproducible():
+    """Test that the same seed yields the same final state fingerprint"""
+    clotho_data = yaml.safe_load(TEST_YAML)
+    chaos = ChaosMatrix(clotho_data, 'test_scenario', max_workers=1)
+    
+    first = chaos._run_single_simulation(9000)
+    second = chaos._run_single_simulation(9000)
+    os.remove(second.db_path)  # Same seed, same database file
+    
+    assert len(first.state_fingerprints) == 2
+    assert first.state_fingerprints == second.state_fingerprints
+
+
+def test_fingerprint_failure_does_not_fail_run(monkeypatch):
+    """Test that an error while digesting the final state only skips the fingerprint"""
+    def broken_digest(rows):
+        raise ValueError('unhashable row')
+    monkeypatch.setattr('core.chaos.chaos_matrix.compute_rows_digest', broken_digest)
+    chaos = ChaosMatrix(yaml.safe_load(TEST_YAML), 'test_scenario', max_workers=1)
+    
+    result = chaos._run_single_simulation(9100)
+    os.remove(result.db_path)
+    
+    assert result.success
+    assert len(result.state_fingerprints) == 1  # Initial state only
+
+
+def test_final_state_validation_in_sql(tmp_path):
+    """Test the M6 balance checks on a hand-built final state"""
+    chaos = ChaosMatrix(yaml.safe_load(TEST_YAML), 'test_scenario', max_workers=1)
+    conn = sqlite3.connect(str(tmp_path / 'state.sqlite'))
+    conn.execute("CREATE TABLE event_log (trigger_message TEXT)")
+    conn.execute("CREATE TABLE Bank_accounts (id TEXT, balance REAL)")
+    cursor = conn.cursor()
+    
+    conn.executemany("INSERT INTO Bank_accounts VALUES (?, ?)", [('a', 60.0), ('b', 40.0)])
+    assert chaos._validate_final_state(cursor, ['Bank_accounts'], 100.0, 0) is None
+    assert 'not conserved' in chaos._validate_final_state(cursor, ['Bank_accounts'], 90.0, 0)
+    
+    conn.execute("UPDATE Bank_accounts SET balance = ? WHERE id = 'b'", (float('inf'),))
+    assert chaos._validate_final_state(cursor, ['Bank_accounts'], 100.0, 0) == "Infinite balance in Bank_accounts: inf"
+    conn.execute("UPDATE Bank_accounts SET balance = 'Infinity' WHERE id = 'b'")  # TEXT, as float() reads it
+    assert chaos._validate_final_state(cursor, ['Bank_accounts'], 100.0, 0) == "Infinite balance in Bank_accounts: Infinity"
+    
+    conn.execute("UPDATE Bank_accounts SET balance = NULL WHERE id = 'b'")
+    assert chaos._validate_final_state(cursor, ['Bank_accounts'], 100.0, 0) == "NULL balance in Bank_accounts: 1 row(s)"
+    
+    conn.execute("UPDATE Bank_accounts SET balance = -5 WHERE id = 'b'")
+    assert chaos._validate_final_state(cursor, ['Bank_accounts'], 100.0, 0) == "Negative balance in Bank_accounts: 1 row(s), min=-5.00"
+    
+    # Score fallback: 10 points per PlayerAction event
+    conn.execute("CREATE TABLE Game_players (player_id TEXT, score INTEGER)")
+    conn.executemany("INSERT INTO Game_players VALUES (?, ?)", [('p1', 20), ('p2', None)])
+    assert chaos._validate_final_state(cursor, ['Game_players'], 0.0, 2) is None
+    assert 'Lost Update in Game_players! score=20, expected=30' in chaos._validate_final_state(cursor, ['Game_players'], 0.0, 3)
+    conn.close()
+
+
+def test_m6_checks_planned_from_invariants(tmp_path):
+    """Test that declared invariants drop the M6 checks they already cover"""
+    clotho_data = yaml.safe_load(TEST_YAML)
+    clotho_data['test'] = {'invariants': [
+        {'name': 'No overdraft', 'check': 'read.Bank_accounts.balance >= 0'},
+    ]}
+    chaos = ChaosMatrix(clotho_data, 'test_scenario', max_workers=1)
+    assert chaos._m6_checks == {'negative', 'null', 'inf'}
+    assert chaos._balance_floor_tables == {'Bank_accounts'}
+    
+    conn = sqlite3.connect(str(tmp_path / 'state.sqlite'))
+    conn.execute("CREATE TABLE Bank_accounts (id TEXT, balance REAL)")
+    conn.execute("CREATE TABLE Bank_loans (id TEXT, balance REAL)")
+    conn.executemany("INSERT INTO Bank_accounts VALUES (?, ?)", [('a', -5.0), ('b', None)])
+    conn.execute("INSERT INTO Bank_loans VALUES ('l', -1.0)")
+    cursor = conn.cursor()
+    
+    # Conservation is a fallback, the overdraft is left to the invariant, NULLs still fail
+    assert chaos._validate_final_state(cursor, ['Bank_accounts'], 500.0, 0) == "NULL balance in Bank_accounts: 1 row(s)"
+    assert chaos._validate_final_state(cursor, ['Bank_loans'], 500.0, 0) == "Negative balance in Bank_loans: 1 row(s), min=-1.00"
+    # -inf is not reported as negative in a floor-exempt table, but is still infinite
+    conn.execute("UPDATE Bank_accounts SET balance = ? WHERE id = 'b'", (float('-inf'),))
+    assert chaos._validate_final_state(cursor, ['Bank_accounts'], 500.0, 0) == "Infinite balance in Bank_accounts: -inf"
+    conn.close()
+
+
+def test_unfuzzed_runs_share_spec():
+    """Test that runs without fuzzing never copy or mutate the spec"""
+    clotho_data = yaml.safe_load(TEST_YAML)
+    chaos = ChaosMatrix(clotho_data, 'test_scenario', max_workers=1)
+    
+    def fail(seed):
+        raise AssertionError("_apply_fuzzing must not run without fuzzing")
+    chaos._apply_fuzzing = fail
+    
+    result = chaos._run_single_simulation(9100)
+    os.remove(result.db_path)
+    
+    assert result.success
+    # Nested dicts (e.g. handlers) are untouched too, so spec hashes don't drift
+    assert clotho_data == yaml.safe_load(TEST_YAML)
+
+
+def test_invariant_expressions():
+    """Test final-state and message conditions used by YAML invariants"""
+    chaos = ChaosMatrix(yaml.safe_load(TEST_YAML), 'test_scenario', max_workers=1)
+    final_state = {'Bank_accounts': [{'id': 'a', 'balance': 5}, {'id': 'b', 'balance': 7}]}
+    
+    assert chaos._check_final_state_invariant('read.Bank_accounts.balance >= 5', final_state)
+    assert not chaos._check_final_state_invariant('read.Bank_accounts.balance > 5', final_state)
+    assert not chaos._check_final_state_invariant('read.Bank_accounts.balance == 5', final_state)
+    assert chaos._check_final_state_invariant('read.Missing.balance == 5', final_state)
+    assert chaos._check_final_state_invariant('not an expression', final_state)
+    
+    event = {'component': 'Bank', 'trigger_message': 'Transfer'}
+    assert chaos._event_matches_condition(event, 'msg.Transfer')
+    assert chaos._event_matches_condition(event, 'msg.Bank.Transfer')
+    assert not chaos._event_matches_condition(event, 'msg.Shop.Transfer')
+    assert not chaos._event_matches_condition(event, 'msg.a.b.Transfer')
+    assert not chaos._event_matches_condition(event, 'read.Bank.x == 1')
+
+
+def test_ltl_always_eventually():
+    """Test always(A -> eventually(B)) over (component, message) events"""
+    chaos = ChaosMatrix(yaml.safe_load(TEST_YAML), 'test_scenario', max_workers=1)
+    events = [('Bank', 'Start'), ('Bank', 'Done'), ('Bank', 'Start'), ('Shop', 'Done')]
+    
+    assert chaos._check_ltl_invariant(events, 'msg.Start', 'msg.Done', {})
+    assert not chaos._check_ltl_invariant(events, 'msg.Start', 'msg.Bank.Done', {})
+    assert not chaos._check_ltl_invariant(events + [('Bank', 'Start')], 'msg.Start', 'msg.Done', {})
+    assert chaos._check_ltl_invariant(events, 'msg.Missing', 'msg.Never', {})
+    assert not chaos._check_ltl_invariant(events, 'msg.Start', 'msg.Start', {})
+    
+    final_state = {'Bank_tasks': [{'status': 'DONE'}]}
+    assert chaos._check_ltl_invariant(events, 'msg.Start', 'read.Bank_tasks.status == DONE', final_state)
+    assert not chaos._check_ltl_invariant(events, 'msg.Start', 'read.Bank_tasks.status != DONE', final_state)
+
+
+def test_stats_aggregation():
+    """Test statistics computed from a mix of passing and failing results"""
+    chaos = ChaosMatrix(yaml.safe_load(TEST_YAML), 'test_scenario', max_workers=1, track_coverage=False)
+    results = [
+        SimulationResult(seed=1, success=True, event_count=3, execution_time_ms=10.0, db_path=''),
+        SimulationResult(seed=2, success=False, event_count=3, execution_time_ms=99.0, db_path='',
+                         error_message='NULL balance in t: 1 row(s)\ndetails'),
+        SimulationResult(seed=3, success=True, event_count=3, execution_time_ms=30.0, db_path=''),
+        SimulationResult(seed=4, success=False, event_count=0, execution_time_ms=1.0, db_path='',
+                         error_message='NULL balance in t: 1 row(s)\nother details'),
+    ]
+    
+    stats = chaos._calculate_stats(results, total_time_ms=140.0)
+    
+    assert (stats.total_runs, stats.completed, stats.failed) == (4, 2, 2)
+    assert stats.success_rate == 50.0
+    assert (stats.avg_execution_time_ms, stats.min_execution_time_ms, stats.max_execution_time_ms) == (20.0, 10.0, 30.0)
+    assert stats.failing_seeds == [2, 4]
+    assert stats.unique_failure_patterns == 1
+    assert stats.failure_messages == ['NULL balance in t: 1 row(s)']
+    
+    empty = chaos._calculate_stats([], total_time_ms=0.0)
+    assert (empty.success_rate, empty.min_execution_time_ms) == (0, 0)
+
+
+def test_fuzzers_reused_and_reseeded():
+    """Test that per-thread fuzzers are reused and give the same output per seed"""
+    clotho_data = yaml.safe_load(TEST_YAML)
+    clotho_data['run']['scenarios'][0]['steps'][0]['payload'] = {'amount': 5, 'note': 'hello'}
+    config = FuzzingConfig(fuzz_inputs=True, fuzz_states=True, seed=1)
+    chaos = ChaosMatrix(clotho_data, 'test_scenario', max_workers=1, fuzzing_config=config)
+    
+    first = chaos._apply_fuzzing(seed=7)
+    fuzzer = chaos._tls.input_fuzzer
+    chaos._apply_fuzzing(seed=8)
+    again = chaos._apply_fuzzing(seed=7)
+    
+    assert chaos._tls.input_fuzzer is fuzzer
+    assert again['run']['scenarios'] == first['run']['scenarios']
+
+
+def test_score_and_balance_invariants_query_sql(tmp_path):
+    """Test that score/balance invariants read the database without a final_state dict"""
+    clotho_data = yaml.safe_load(TEST_YAML)
+    clotho_data['test'] = {'invariants': [{'name': 'Score', 'check': 'score_matches_action_count'}]}
+    chaos = ChaosMatrix(clotho_data, 'test_scenario', max_workers=1)
+    assert not chaos._needs_final_state_dict and not chaos._needs_events
+    
+    conn = sqlite3.connect(str(tmp_path / 'state.sqlite'))
+    conn.execute("CREATE TABLE Game_players (player_id TEXT, score TEXT)")
+    conn.execute("CREATE TABLE Bank_accounts (id TEXT, balance REAL)")
+    conn.executemany("INSERT INTO Game_players VALUES (?, ?)", [('p1', '30'), ('p2', '10'), ('p3', None)])
+    conn.executemany("INSERT INTO Bank_accounts VALUES (?, ?)", [('a', 60.0), ('b', 40.0)])
+    ctx = _RunContext(cursor=conn.cursor(), tables=['Game_players', 'Bank_accounts'],
+                      target_player_id='p1', initial_total=100.0, action_count=3)
+    
+    assert chaos._check_score_invariant('Score', '', None, ctx) is None
+    assert chaos._check_balance_invariant('Money', '', None, ctx) is None
+    
+    ctx.target_player_id = 'p2'
+    ctx.initial_total = 90.0
+    assert 'score=10, expected=30' in chaos._check_score_invariant('Score', '', None, ctx)
+    assert 'Final balance=100.00, expected=90.00' in chaos._check_balance_invariant('Money', '', None, ctx)
+    conn.close()
+
+
+
+def test_default_max_workers(monkeypatch):
+    """Test worker sizing from the CHAOS_MAX_WORKERS override and CPU affinity"""
+    clotho_data = yaml.safe_load(TEST_YAML)
+    
+    monkeypatch.setenv('CHAOS_MAX_WORKERS', '3')
+    assert ChaosMatrix(clotho_data, 'test_scenario').max_workers == 3
+    assert ChaosMatrix(clotho_data, 'test_scenario', max_workers=2).max_workers == 2
+    
+    monkeypatch.setenv('CHAOS_MAX_WORKERS', 'lots')
+    expected = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()
+    assert ChaosMatrix(clotho_data, 'test_scenario').max_workers == expected
+
+
+def test_result_cache_reuses_seed_results(tmp_path):
+    """Test that unchanged specs reuse cached seed results and edited specs don't"""
+    clotho_data = yaml.safe_load(TEST_YAML)
+    cache_dir = str(tmp_path / 'cache')
+    
+    first, _ = ChaosMatrix(clotho_data, 'test_scenario', max_workers=2,
+                           result_cache_dir=cache_dir).run_batch(num_simulations=3, seed_start=9100)
+    chaos = ChaosMatrix(clotho_data, 'test_scenario', max_workers=2, result_cache_dir=cache_dir)
+    second, stats = chaos.run_batch(num_simulations=3, seed_start=9100)
+    
+    assert [r.seed for r in second] == [9100, 9101, 9102]
+    assert [r.execution_time_ms for r in second] == [r.execution_time_ms for r in first]
+    assert second[0].db_path == ''  # Database was cleaned up after the first batch
+    assert stats.completed == 3
+    assert os.path.exists(chaos._result_cache_path(9101))
+    
+    clotho_data['test'] = {'invariants': [{'name': 'Count', 'check': 'read.Counter_state.value >= 0'}]}
+    edited = ChaosMatrix(clotho_data, 'test_scenario', max_workers=1, result_cache_dir=cache_dir)
+    assert edited._spec_hash != chaos._spec_hash
+    assert edited._load_cached_result(9100) is None
+
+
+def test_result_cache_misses_after_handler_edit(tmp_path):
+    """Test that editing one handler step of a v3 spec invalidates cached results"""
+    clotho_data = yaml.safe_load(TEST_YAML)
+    cache_dir = str(tmp_path / 'cache')
+    chaos = ChaosMatrix(clotho_data, 'test_scenario', max_workers=1, result_cache_dir=cache_dir)
+    chaos.run_batch(num_simulations=1, seed_start=9200)
+    
+    # Aliases added by a Simulator run on the same dict don't change the key
+    aliased = dict(clotho_data, components=clotho_data['design']['components'],
+                   scenarios=clotho_data['run']['scenarios'])
+    assert ChaosMatrix(aliased, 'test_scenario', max_workers=1,
+                       result_cache_dir=cache_dir)._spec_hash == chaos._spec_hash
+    
+    step = clotho_data['design']['components'][0]['handlers'][0]['logic'][1]
+    step['set']['count'] = "{{read.current.count + 2}}"
+    edited = ChaosMatrix(clotho_data, 'test_scenario', max_workers=1, result_cache_dir=cache_dir)
+    assert edited._spec_hash != chaos._spec_hash
+    assert edited._load_cached_result(9200) is None
+
+
+def test_divergent_states_keyed_by_digest():
+    """Test that identical final states group under one short digest"""
+    chaos = ChaosMatrix(yaml.safe_load(TEST_YAML), 'test_scenario', max_workers=2, track_coverage=False)
+    db_paths = []
+    
+    def extractor(db_path):
+        db_paths.append(db_path)
+        return chaos._default_state_extractor(db_path)
+    
+    state_to_seeds = chaos.find_divergent_states(num_simulations=4, state_extractor=extractor)
+    for db_path in db_paths:
+        os.remove(db_path)
+    
+    assert sum(len(seeds) for seeds in state_to_seeds.values()) == 4
+    assert all(len(state_hash) == 32 for state_hash in state_to_seeds)
+
+
+def test_divergent_states_rerun_cleaned_up_cached_seeds(tmp_path, monkeypatch):
+    """Test that cached results whose databases were deleted are re-run, not read as empty"""
+    cache_dir = str(tmp_path / 'cache')
+    chaos = ChaosMatrix(yaml.safe_load(TEST_YAML), 'test_scenario', max_workers=2,
+                        track_coverage=False, result_cache_dir=cache_dir)
+    chaos.run_batch(num_simulations=3, seed_start=9400, cleanup_dbs=True)
+    monkeypatch.setattr('core.chaos.chaos_matrix.random.randint', lambda a, b: 9400)
+    db_paths = []
+    
+    def extractor(db_path):
+        db_paths.append(db_path)
+        return chaos._default_state_extractor(db_path)
+    
+    cached = ChaosMatrix(yaml.safe_load(TEST_YAML), 'test_scenario', max_workers=2,
+                         track_coverage=False, result_cache_dir=cache_dir)
+    state_to_seeds = cached.find_divergent_states(num_simulations=3, state_extractor=extractor)
+    for db_path in db_paths:
+        os.remove(db_path)
+    
+    assert sorted(sum(state_to_seeds.values(), [])) == [9400, 9401, 9402]
+    assert all(db_paths)
+    with pytest.raises(ValueError):
+        chaos._default_state_extractor('')
+
+def test_safe_delete(tmp_path):
+    """Test that DB cleanup removes files and ignores ones already gone"""
+    db_path = tmp_path / 'run.sqlite'
+    db_path.write_bytes(b'')
+    
+    _safe_delete(str(db_path))
+    assert not db_path.exists()
+    _safe_delete(str(db_path))  # Missing file: no error
+
+
+def test_repeated_warnings_logged_once(caplog):
+    """Test that an identical per-run warning is logged at WARNING only once"""
+    with caplog.at_level('DEBUG', logger='core.chaos.chaos_matrix'):
+        for _ in range(3):
+            _warn_once("Failed to capture final state fingerprint: test")
+    
+    levels = [record.levelname for record in caplog.records]
+    assert levels == ['WARNING', 'DEBUG', 'DEBUG']
+
+
+
+class _TaggingChaosMatrix(ChaosMatrix):
+    """Subclass whose override must also run in worker processes"""
+    
+    def _run_single_simulation(self, seed):
+        result = super()._run_single_simulation(seed)
+        result.final_state = {'matrix': type(self).__name__}
+        return result
+
+
+def test_run_batch_uses_subclass_in_workers():
+    """Test that workers (and the in-process fallback) run the caller's subclass"""
+    clotho_data = yaml.safe_load(TEST_YAML)
+    
+    class LocalTaggingChaosMatrix(_TaggingChaosMatrix):
+        pass  # Not importable by name, so seeds run in-process
+    
+    for matrix_cls in (_TaggingChaosMatrix, LocalTaggingChaosMatrix):
+        chaos = matrix_cls(clotho_data, 'test_scenario', max_workers=2)
+        results, stats = chaos.run_batch(num_simulations=4, seed_start=9300, cleanup_dbs=True)
+        
+        assert stats.completed == 4
+        assert all(r.final_state == {'matrix': matrix_cls.__name__} for r in results)
+
 if __name__ == "__main__":
     print("Running M4 Chaos Matrix Tests...\n")
     test_batch_execution()
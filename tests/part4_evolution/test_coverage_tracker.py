@@ -0,0 +1,123 @@
+"""
+M5: State Coverage Tracker Tests
+
+Verifies state fingerprinting and coverage statistics.
+"""
+
+from core.chaos.coverage_tracker import CoverageTracker, RowsDigest, compute_state_fingerprint, compute_rows_digest
+from core.chaos.reliability_scorer import ReliabilityScorer
+
+
+def test_rows_digest_ignores_row_order():
+    """Test that table digests do not depend on insertion order"""
+    rows = [('alice', 100, None), ('bob', 50.5, 'x'), ('carol', 0, b'\x00')]
+    
+    assert compute_rows_digest(rows) == compute_rows_digest(reversed(rows))
+    assert compute_rows_digest(rows) != compute_rows_digest(rows[:2])
+    assert compute_rows_digest([]) == "0:0000000000000000"
+
+
+def test_rows_digest_counts_duplicates():
+    """Test that duplicate rows change the digest instead of cancelling out"""
+    row = ('alice', 100)
+    
+    assert compute_rows_digest([row, row]) != compute_rows_digest([])
+    assert compute_rows_digest([row, row]) != compute_rows_digest([row])
+
+
+def test_rows_digest_distinguishes_values():
+    """Test that changing one column changes the digest"""
+    assert compute_rows_digest([('alice', 100)]) != compute_rows_digest([('alice', 101)])
+    assert compute_rows_digest([('alice', 1)]) != compute_rows_digest([('alice', '1')])
+
+
+def test_rows_digest_incremental_updates():
+    """Test that RowsDigest tracks row changes without rehashing the table"""
+    rows = [('alice', 100), ('bob', 50)]
+    digest = RowsDigest(rows)
+    assert digest.hexdigest() == compute_rows_digest(rows)
+    
+    digest.update_row(('bob', 50), ('bob', 75))
+    assert digest.hexdigest() == compute_rows_digest([('alice', 100), ('bob', 75)])
+    
+    digest.add_row(('carol', 0))
+    digest.remove_row(('alice', 100))
+    assert digest.hexdigest() == compute_rows_digest([('carol', 0), ('bob', 75)])
+
+
+def test_tracker_counts_unique_states():
+    """Test that repeated fingerprints are observed but not unique"""
+    tracker = CoverageTracker()
+    fp_a = compute_state_fingerprint({'account': compute_rows_digest([('alice', 1)])})
+    fp_b = compute_state_fingerprint({'account': compute_rows_digest([('alice', 2)])})
+    
+    assert tracker.add_state(fp_a)
+    assert not tracker.add_state(fp_a)
+    assert tracker.add_state(fp_b)
+    
+    stats = tracker.get_coverage_stats()
+    assert stats.unique_states == 2
+    assert stats.total_observations == 3
+    
+    # Hex strings are stored as raw digests, so the bytes form is the same state
+    assert bytes.fromhex(fp_a) in tracker.state_fingerprints
+    assert not tracker.add_state(bytes.fromhex(fp_b))
+
+
+def test_tracker_bulk_add():
+    """Test that add_states counts observations and new states like repeated add_state"""
+    tracker = CoverageTracker()
+    fp_a, fp_b = f"{1:064x}", f"{2:064x}"
+    
+    assert tracker.add_states([fp_a, fp_a, bytes.fromhex(fp_b)]) == 2
+    assert tracker.add_states([fp_b]) == 0
+    assert tracker.get_coverage_stats().total_observations == 4
+    assert tracker.get_coverage_stats().unique_states == 2
+
+
+def test_estimate_total_states():
+    """Test the Heaps' law estimate of the total state space"""
+    tracker = CoverageTracker()
+    for i in range(99):
+        tracker.add_state(f"{i % 40:064x}")
+    assert tracker.estimate_total_states() is None  # Fewer than 100 observations
+    
+    tracker.add_state(f"{0:064x}")
+    assert tracker.estimate_total_states() == 126  # int(40 * sqrt(10))
+
+
+def test_reliability_score_memoized():
+    """Test that repeated coverage snapshots reuse the cached score arithmetic"""
+    tracker = CoverageTracker()
+    tracker.add_states([f"{i % 30:064x}" for i in range(120)])
+    coverage = tracker.get_coverage_stats()
+    
+    first = ReliabilityScorer.compute_score(coverage, 40)
+    hits = ReliabilityScorer._score_kernel.cache_info().hits
+    second = ReliabilityScorer.compute_score(coverage, 40)
+    
+    assert second == first
+    assert ReliabilityScorer._score_kernel.cache_info().hits == hits + 1
+    assert first.estimated_total_states == 94  # int(30 * sqrt(10))
+    assert 0 < first.confidence_lower < first.confidence_upper <= 100
+    assert not hasattr(first, '__dict__')
+    assert hash(first) == hash(second)
+
+
+def test_score_only_matches_full_score():
+    """Test that the score-only fast path agrees with compute_score"""
+    tracker = CoverageTracker()
+    assert ReliabilityScorer.compute_score_only(tracker.get_coverage_stats(), 5) == 0.0
+    
+    tracker.add_states([f"{i % 7:064x}" for i in range(50)])
+    coverage = tracker.get_coverage_stats()
+    for sims in (1, 10, 1000):
+        expected = ReliabilityScorer.compute_score(coverage, sims).score
+        assert ReliabilityScorer.compute_score_only(coverage, sims) == expected
+
+
+def test_recommend_simulations():
+    """Test that recommendations grow by 2^(gap/7) and at least double"""
+    assert ReliabilityScorer.recommend_simulations(96, 95, 100) == 0
+    assert ReliabilityScorer.recommend_simulations(81, 95, 100) == 300  # 2^2 = 4x total
+    assert ReliabilityScorer.recommend_simulations(94, 95, 100) == 100  # at least double
@@ -0,0 +1,332 @@
+"""
+Unit tests for TraceAnalyzer queries.
+
+Tests cover:
+- Event loading and row history lookup by table and primary key
+- event_log index creation
+- Before/after diffs for UPDATE events and time-travel state
+- DAG traversal on causation chains deeper than the recursion limit
+- Batched event-chain queries
+- DAG caching and invalidation
+"""
+
+import unittest
+import sqlite3
+import os
+import json
+import threading
+import tempfile
+import shutil
+from datetime import datetime
+
+from core.analysis.trace_analyzer import TraceAnalyzer
+
+
+class TestRowHistory(unittest.TestCase):
+    """Test row history reconstruction from the event log"""
+
+    def setUp(self):
+        """Set up a database with CREATE/UPDATE events on two tables"""
+        self.test_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.test_dir, 'test.sqlite')
+
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            CREATE TABLE event_log (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                event_id TEXT,
+                timestamp TEXT,
+                correlation_id TEXT,
+                causation_id TEXT,
+                component TEXT,
+                handler_name TEXT,
+                trigger_message TEXT,
+                table_name TEXT,
+                action TEXT,
+                row_id TEXT,
+                payload TEXT
+            )
+        ''')
+
+        events = [
+            ('evt_1', '2025-01-01T10:00:00', 'tx_1', None, 'Bank', 'Open', None, 'Bank_account', 'CREATE',
+             {'id': 'alice', 'balance': 100}),
+            ('evt_2', '2025-01-01T10:00:01', 'tx_1', None, 'Bank', 'Open', None, 'Bank_account', 'CREATE',
+             {'id': 'bob', 'balance': 50}),
+            ('evt_3', '2025-01-01T10:00:02', 'tx_1', None, 'Bank', 'Pay', None, 'Bank_account', 'UPDATE',
+             {'update': {'balance': 70}, 'where': {'id': 'alice'}}),
+            ('evt_4', '2025-01-01T10:00:03', 'tx_1', None, 'Bank', 'Pay', None, 'Bank_ledger', 'CREATE',
+             {'id': 'alice', 'amount': 30}),
+            ('evt_5', '2025-01-01T10:00:04', 'tx_1', None, 'Bank', 'Pay', None, 'Bank_account', 'UPDATE',
+             {'update': {'balance': 40}, 'where': {'id': 'alice'}}),
+        ]
+        cursor.executemany('''
+            INSERT INTO event_log (event_id, timestamp, correlation_id, causation_id, component,
+                                  handler_name, trigger_message, table_name, action, row_id, payload)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, NULL, ?)
+        ''', [e[:-1] + (json.dumps(e[-1]),) for e in events])
+        conn.commit()
+        conn.close()
+
+        self.analyzer = TraceAnalyzer(self.db_path)
+
+    def tearDown(self):
+        """Clean up test environment"""
+        self.analyzer.close()
+        shutil.rmtree(self.test_dir)
+
+    def test_history_filters_by_table_and_pk(self):
+        """Only events for the requested row of the requested table are returned"""
+        history = self.analyzer.get_history_for_field('Bank_account', 'alice')
+
+        self.assertEqual([e['event_id'] for e in history], ['evt_1', 'evt_3', 'evt_5'])
+        self.assertEqual(history[0]['payload'], {'id': 'alice', 'balance': 100})
+        self.assertEqual(history[1]['payload']['update'], {'balance': 70})
+
+    def test_history_for_unknown_row(self):
+        """Unknown rows have an empty history"""
+        self.assertEqual(self.analyzer.get_history_for_field('Bank_account', 'carol'), [])
+
+    def test_all_events_are_decoded(self):
+        """get_all_events decodes payloads and labels each event"""
+        events = self.analyzer.get_all_events()
+
+        self.assertEqual(len(events), 5)
+        self.assertEqual(events[0]['payload'], {'id': 'alice', 'balance': 100})
+        self.assertEqual(events[0]['action_display'], 'CREATE on account')
+        self.assertEqual(events[3].get('action_display'), 'CREATE on ledger')
+
+        # The label is a stored key, so copies and serialized events keep it
+        self.assertEqual(dict(events[0])['action_display'], 'CREATE on account')
+        self.assertEqual(set(events[0]), {'event_id', 'timestamp', 'correlation_id', 'causation_id', 'component',
+                                          'handler_name', 'trigger_message', 'table_name', 'action',
+                                          'payload', 'action_display'})
+        self.assertEqual(json.loads(json.dumps(events[0]))['action_display'], 'CREATE on account')
+
+    def test_indexes_created_on_init(self):
+        """The analyzer adds its lookup indexes to a writable database"""
+        conn = sqlite3.connect(self.db_path)
+        indexes = {row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='index' AND tbl_name='event_log'")}
+        conn.close()
+
+        self.assertIn('idx_event_log_table_ts', indexes)
+        self.assertIn('idx_event_log_correlation', indexes)
+
+    def test_connection_is_reused_per_thread(self):
+        """Queries share one connection per thread until close()"""
+        conn = self.analyzer._connect()
+        self.analyzer.get_history_for_field('Bank_account', 'alice')
+        self.assertIs(self.analyzer._connect(), conn)
+
+        self.analyzer.close()
+        self.assertIsNot(self.analyzer._connect(), conn)
+
+    def test_close_closes_other_threads_connections(self):
+        """close() also closes connections opened by other threads"""
+        opened = []
+        worker = threading.Thread(target=lambda: opened.append(self.analyzer._connect()))
+        worker.start()
+        worker.join()
+
+        self.analyzer.close()
+        with self.assertRaises(sqlite3.ProgrammingError):
+            opened[0].execute("SELECT 1")
+        self.assertEqual(len(self.analyzer.get_history_for_field('Bank_account', 'alice')), 3)
+
+    def test_missing_database_is_not_created(self):
+        """ensure_indexes never creates a database file"""
+        missing = os.path.join(self.test_dir, 'missing.sqlite')
+        analyzer = TraceAnalyzer(missing)
+
+        self.assertFalse(analyzer.ensure_indexes())
+        self.assertFalse(os.path.exists(missing))
+
+    def test_diff_for_update_replays_earlier_events(self):
+        """The before-state of an UPDATE folds all earlier events of that row"""
+        event = self.analyzer.get_history_for_field('Bank_account', 'alice')[-1]
+        before, after = self.analyzer.get_diff_for_event(event)
+
+        self.assertEqual(before, {'id': 'alice', 'balance': 70})
+        self.assertEqual(after, {'balance': 40})
+
+    def test_diff_before_state_is_memoized(self):
+        """Repeated diffs reuse the cached before-state but hand out copies"""
+        event = self.analyzer.get_history_for_field('Bank_account', 'alice')[-1]
+        before, _ = self.analyzer.get_diff_for_event(event)
+        before['balance'] = -1
+
+        again, _ = self.analyzer.get_diff_for_event(event)
+        self.assertEqual(again, {'id': 'alice', 'balance': 70})
+        self.assertEqual(self.analyzer._before_state_cached.cache_info().hits, 1)
+
+        self.analyzer.invalidate_cache()
+        self.assertEqual(self.analyzer._before_state_cached.cache_info().currsize, 0)
+
+    def test_diff_from_warm_cache_matches_query(self):
+        """Before-states folded from the event cache match the SQL path"""
+        event = self.analyzer.get_history_for_field('Bank_account', 'alice')[-1]
+        cold_before, _ = self.analyzer.get_diff_for_event(event)
+
+        events = self.analyzer.get_all_events()
+        warm_before, _ = self.analyzer.get_diff_for_event(event)
+
+        self.assertEqual(warm_before, cold_before)
+        self.assertEqual(events[0]['payload'], {'id': 'alice', 'balance': 100})
+
+    def test_state_at_timestamp_reverts_later_events(self):
+        """Time travel drops later CREATEs and undoes later UPDATEs"""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("CREATE TABLE Bank_account (id TEXT PRIMARY KEY, balance INTEGER)")
+        conn.executemany("INSERT INTO Bank_account VALUES (?, ?)", [('alice', 40), ('bob', 50)])
+        conn.commit()
+        conn.close()
+
+        state = self.analyzer.get_state_at_timestamp('2025-01-01T10:00:02')
+        self.assertEqual(state['Bank_account'], {'alice': {'id': 'alice', 'balance': 70},
+                                                 'bob': {'id': 'bob', 'balance': 50}})
+
+        state = self.analyzer.get_state_at_timestamp('2025-01-01T10:00:00')
+        self.assertEqual(state['Bank_account'], {'alice': {'id': 'alice', 'balance': 100}})
+
+    def test_state_at_timestamp_for_seeded_row(self):
+        """Seeded rows (no CREATE event) only revert columns with an earlier UPDATE"""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("CREATE TABLE Bank_account (id TEXT PRIMARY KEY, balance INTEGER, tier TEXT)")
+        conn.executemany("INSERT INTO Bank_account VALUES (?, ?, ?)",
+                         [('alice', 40, 'basic'), ('carol', 90, 'gold')])
+        conn.executemany('''
+            INSERT INTO event_log (event_id, timestamp, correlation_id, table_name, action, payload)
+            VALUES (?, ?, 'tx_1', 'Bank_account', 'UPDATE', ?)
+        ''', [
+            ('evt_c1', '2025-01-01T10:00:01', json.dumps({'update': {'balance': 60}, 'where': {'id': 'carol'}})),
+            ('evt_c2', '2025-01-01T10:00:06', json.dumps({'update': {'balance': 90, 'tier': 'gold'},
+                                                          'where': {'id': 'carol'}})),
+        ])
+        conn.commit()
+        conn.close()
+
+        carol = self.analyzer.get_state_at_timestamp('2025-01-01T10:00:02')['Bank_account']['carol']
+
+        # balance was also set before the target, so the later UPDATE is reverted
+        self.assertEqual(carol['balance'], 60)
+        # tier was only changed after the target; its seed value is not in the log
+        self.assertEqual(carol['tier'], 'gold')
+
+    def test_row_state_accepts_datetime(self):
+        """datetime timestamps compare like the stored ISO-8601 text"""
+        state = self.analyzer._get_row_state_before_event(
+            'Bank_account', 'alice', datetime(2025, 1, 1, 10, 0, 3))
+
+        self.assertEqual(state, {'id': 'alice', 'balance': 70})
+
+
+class TestDeepCausationChain(unittest.TestCase):
+    """Test DAG analysis on a long linear causation chain"""
+
+    DEPTH = 3000
+
+    def setUp(self):
+        """Set up a chain evt_0 -> evt_1 -> ... -> evt_{DEPTH-1}"""
+        self.test_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.test_dir, 'deep.sqlite')
+
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''
+            CREATE TABLE event_log (
+                event_id TEXT,
+                causation_id TEXT,
+                correlation_id TEXT,
+                timestamp TEXT,
+                component TEXT,
+                handler_name TEXT,
+                trigger_message TEXT,
+                table_name TEXT,
+                action TEXT,
+                row_id TEXT,
+                payload TEXT
+            )
+        ''')
+        events = [
+            (f'evt_{i}', f'evt_{i - 1}' if i else None, 'tx_1', f'2025-01-01T10:00:00.{i:06d}',
+             'Comp', 'Handler', 'Msg', 'Comp_handler', 'HANDLER_EXEC', None, '{}')
+            for i in range(self.DEPTH)
+        ]
+        conn.executemany('''
+            INSERT INTO event_log (event_id, causation_id, correlation_id, timestamp, component,
+                                  handler_name, trigger_message, table_name, action, row_id, payload)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', events)
+        conn.commit()
+        conn.close()
+
+        self.analyzer = TraceAnalyzer(self.db_path)
+
+    def tearDown(self):
+        """Clean up test environment"""
+        self.analyzer.close()
+        shutil.rmtree(self.test_dir)
+
+    def test_critical_path_covers_whole_chain(self):
+        """The critical path of a linear chain is the chain itself"""
+        path = self.analyzer.get_critical_path('tx_1')
+
+        self.assertEqual(len(path), self.DEPTH)
+        self.assertEqual(path[0], 'evt_0')
+        self.assertEqual(path[-1], f'evt_{self.DEPTH - 1}')
+
+    def test_forward_chain_reaches_every_descendant(self):
+        """Forward traversal from the root visits the chain in causal order"""
+        chain = self.analyzer.get_event_chain('evt_0', direction='forward')
+
+        self.assertEqual(chain, [f'evt_{i}' for i in range(self.DEPTH)])
+
+    def test_backward_chain_reaches_root(self):
+        """Backward traversal from the last event walks every ancestor"""
+        chain = self.analyzer.get_event_chain(f'evt_{self.DEPTH - 1}', direction='backward')
+
+        self.assertEqual(chain, [f'evt_{i}' for i in reversed(range(self.DEPTH))])
+
+    def test_batched_chains_match_single_queries(self):
+        """get_event_chains returns the same chains as per-event calls"""
+        starts = ['evt_10', 'evt_2', 'evt_unknown']
+        chains = self.analyzer.get_event_chains(starts, direction='backward')
+
+        self.assertEqual(chains['evt_10'], self.analyzer.get_event_chain('evt_10'))
+        self.assertEqual(chains['evt_2'], ['evt_2', 'evt_1', 'evt_0'])
+        self.assertEqual(chains['evt_unknown'], [])
+
+    def test_topology_only_dag(self):
+        """topology_only nodes carry just the ids needed for traversal"""
+        dag = self.analyzer.get_trace_as_dag('tx_1', topology_only=True)
+
+        self.assertEqual(dag['nodes'][1], {'event_id': 'evt_1', 'causation_id': 'evt_0'})
+        self.assertEqual(len(dag['edges']), self.DEPTH - 1)
+
+    def test_dag_is_cached_until_invalidated(self):
+        """Repeated DAG queries reuse the cached result until invalidate_cache()"""
+        dag = self.analyzer.get_trace_as_dag('tx_1')
+        self.assertEqual(self.analyzer.get_trace_as_dag('tx_1'), dag)
+
+        # Callers get a copy, so modifying it leaves the cached DAG intact
+        dag['nodes'][0]['actions'].clear()
+        dag['edges'].clear()
+        fresh = self.analyzer.get_trace_as_dag('tx_1')
+        self.assertTrue(fresh['nodes'][0]['actions'])
+        self.assertEqual(len(fresh['edges']), self.DEPTH - 1)
+
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(
+            "INSERT INTO event_log (event_id, causation_id, correlation_id, timestamp, payload) "
+            "VALUES ('evt_extra', 'evt_0', 'tx_1', '2025-01-01T11:00:00', '{}')")
+        conn.commit()
+        conn.close()
+
+        self.assertEqual(len(self.analyzer.get_trace_as_dag('tx_1')['nodes']), self.DEPTH)
+        self.analyzer.invalidate_cache()
+        self.assertEqual(len(self.analyzer.get_trace_as_dag('tx_1')['nodes']), self.DEPTH + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()